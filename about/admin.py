@@ -18,4 +18,19 @@ class AboutAdmin(SummernoteModelAdmin):
 @admin.register(CollaborateRequest)
 class CollaborateRequestAdmin(admin.ModelAdmin):
 
-    list_display = ('message', 'read',)
+    list_display = ('message', 'read', 'spam_score', 'duplicate_of')
+    list_filter = ('read',)
+    list_select_related = ('duplicate_of',)
+    actions = ['mark_read', 'mark_unread']
+
+    @admin.action(description='Mark selected requests as read',
+                  permissions=['change'])
+    def mark_read(self, request, queryset):
+        updated = queryset.update(read=True)
+        self.message_user(request, f'{updated} request(s) marked as read.')
+
+    @admin.action(description='Mark selected requests as unread',
+                  permissions=['change'])
+    def mark_unread(self, request, queryset):
+        updated = queryset.update(read=False)
+        self.message_user(request, f'{updated} request(s) marked as unread.')
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.24 on 2026-10-18 17:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('about', '0004_rename_featured_image_about_profile_image'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='collaboraterequest',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='about.collaboraterequest'),
+        ),
+        migrations.AddField(
+            model_name='collaboraterequest',
+            name='spam_score',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='collaboraterequest',
+            index=models.Index(fields=['read', 'id'], name='collaborate_read_idx'),
+        ),
+    ]
@@ -1,8 +1,14 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from cloudinary.models import CloudinaryField
 
+from codestar.routers import primary
+
 # Create your models here.
 
+ABOUT_CACHE_KEY = "about:profile"
+
 
 class About(models.Model):
     """
@@ -22,6 +28,45 @@ class About(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def load(cls):
+        """
+        Return the current profile, the most recently updated row, or
+        ``None`` if there is none.
+
+        The result is cached for ``BLOG_CACHE_TIMEOUT`` seconds, and
+        dropped when an About is saved or deleted (see
+        :mod:`about.signals`), so the page normally makes no query for
+        it. The timeout bounds how long other processes keep a stale
+        copy when the cache is per process.
+        """
+        cached = cache.get(ABOUT_CACHE_KEY)
+        if cached is None:
+            # Wrapped in a tuple so a missing profile is cached too. Read
+            # from the primary, as a lagging replica's copy would be kept.
+            with primary():
+                cached = (cls.objects.order_by('-updated_on').first(),)
+            cache.set(ABOUT_CACHE_KEY, cached, settings.BLOG_CACHE_TIMEOUT)
+        return cached[0]
+
+    @classmethod
+    async def aload(cls):
+        """Async version of :meth:`load`."""
+        cached = await cache.aget(ABOUT_CACHE_KEY)
+        if cached is None:
+            with primary():
+                cached = (
+                    await cls.objects.order_by('-updated_on').afirst(),
+                )
+            await cache.aset(
+                ABOUT_CACHE_KEY, cached, settings.BLOG_CACHE_TIMEOUT
+            )
+        return cached[0]
+
+    @staticmethod
+    def clear_cache():
+        cache.delete(ABOUT_CACHE_KEY)
+
 
 class CollaborateRequest(models.Model):
     """
@@ -32,11 +77,25 @@ class CollaborateRequest(models.Model):
         email (EmailField): Email address of the requester.
         message (TextField): The collaboration message or inquiry.
         read (BooleanField): Whether the request has been read/processed.
+        spam_score (PositiveSmallIntegerField): 0-100 spam likelihood, set
+            by the background processing in :mod:`about.tasks`.
+        duplicate_of (ForeignKey): An earlier identical request from the
+            same email address, if any.
     """
     name = models.CharField(max_length=200)
     email = models.EmailField()
     message = models.TextField()
     read = models.BooleanField(default=False)
+    spam_score = models.PositiveSmallIntegerField(null=True, editable=False)
+    duplicate_of = models.ForeignKey(
+        'self', null=True, blank=True, editable=False,
+        on_delete=models.SET_NULL, related_name='duplicates',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['read', 'id'], name='collaborate_read_idx'),
+        ]
 
     def __str__(self):
         return f"Collaboration request from {self.name}"
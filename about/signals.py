@@ -0,0 +1,20 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import About, CollaborateRequest
+from .tasks import process_collaborate_request
+
+
+@receiver(post_save, sender=About)
+@receiver(post_delete, sender=About)
+def about_changed(sender, instance, **kwargs):
+    """Drop the cached profile once the change is committed."""
+    transaction.on_commit(About.clear_cache)
+
+
+@receiver(post_save, sender=CollaborateRequest)
+def collaborate_request_created(sender, instance, created, **kwargs):
+    """Queue the follow-up work so the form response does not wait on it."""
+    if created:
+        process_collaborate_request.delay(request_id=instance.pk)
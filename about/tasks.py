@@ -0,0 +1,59 @@
+import re
+
+from django.core.mail import mail_admins
+
+from codestar.tasks import task
+from .models import CollaborateRequest
+
+SPAM_WORDS = (
+    "casino", "crypto", "bitcoin", "viagra", "loan", "seo", "backlinks",
+    "winner", "free money",
+)
+# Requests scoring this or more are marked read without an email.
+SPAM_THRESHOLD = 50
+
+
+def spam_score(message):
+    """
+    A rough 0-100 spam likelihood for a collaboration message, from its
+    links, spam words and shouting.
+    """
+    text = message.lower()
+    score = 15 * len(re.findall(r"https?://", text))
+    score += 20 * sum(word in text for word in SPAM_WORDS)
+    letters = [char for char in message if char.isalpha()]
+    if letters and sum(char.isupper() for char in letters) > len(letters) / 2:
+        score += 25
+    return min(score, 100)
+
+
+@task
+def process_collaborate_request(request_id):
+    """
+    Score a new :model:`about.CollaborateRequest`, link it to an
+    earlier identical request from the same address, and email the
+    admins about it unless it is a duplicate or likely spam.
+
+    A missing request raises, so the task is retried rather than
+    recorded as done.
+    """
+    request = CollaborateRequest.objects.get(pk=request_id)
+    request.spam_score = spam_score(request.message)
+    request.duplicate_of = (
+        CollaborateRequest.objects.filter(
+            email__iexact=request.email,
+            message=request.message,
+            pk__lt=request.pk,
+        )
+        .order_by('pk')
+        .first()
+    )
+    if request.duplicate_of or request.spam_score >= SPAM_THRESHOLD:
+        request.read = True
+    request.save(update_fields=['spam_score', 'duplicate_of', 'read'])
+
+    if not request.read:
+        mail_admins(
+            f"Collaboration request from {request.name}",
+            f"From: {request.name} <{request.email}>\n\n{request.message}",
+        )
@@ -1,3 +1,177 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from codestar.models import DONE, PENDING, Task
+from codestar.webmode import async_views
+from .models import About, CollaborateRequest
+from .tasks import SPAM_THRESHOLD, process_collaborate_request
+
+
+class AboutConditionalGetTests(TestCase):
+    """
+    Tests for ETag handling on the About page.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.about = About.objects.create(title="Me", content="Bio")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_page_is_not_modified(self):
+        # The first response sets the CSRF cookie the ETag depends on.
+        self.client.get(reverse("about"))
+        response = self.client.get(reverse("about"))
+        response = self.client.get(
+            reverse("about"), HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_edit_changes_etag(self):
+        etag = self.client.get(reverse("about"))["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.about.content = "New bio"
+            self.about.save()
+        response = self.client.get(
+            reverse("about"), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class AboutCacheTests(TestCase):
+    """
+    Tests for the cached About profile.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.about = About.objects.create(title="Me", content="Bio")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_get_makes_no_queries(self):
+        self.client.get(reverse("about"))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse("about"))
+        self.assertContains(response, "Bio")
+
+    def test_save_and_delete_invalidate(self):
+        self.assertEqual(About.load(), self.about)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.about.title = "Renamed"
+            self.about.save()
+        self.assertContains(self.client.get(reverse("about")), "Renamed")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.about.delete()
+        with self.assertNumQueries(1):
+            self.assertIsNone(About.load())
+            self.assertIsNone(About.load())
+
+    def test_profile_expires_with_blog_cache_timeout(self):
+        with override_settings(BLOG_CACHE_TIMEOUT=0):
+            About.load()
+            # Another process's edit, whose signal this cache never sees.
+            About.objects.update(title="Edited elsewhere")
+            self.assertEqual(About.load().title, "Edited elsewhere")
+
+
+class AsyncAboutTests(TestCase):
+    """
+    Tests for the async About view served when ``WEB_MODE`` is "async".
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.about = About.objects.create(title="Me", content="Bio")
+
+    def setUp(self):
+        cache.clear()
+        views = async_views()
+        views.__enter__()
+        self.addCleanup(views.__exit__, None, None, None)
+
+    async def test_get_and_revalidate(self):
+        # The first response sets the CSRF cookie the ETag depends on.
+        await self.async_client.get(reverse("about"))
+        response = await self.async_client.get(reverse("about"))
+        self.assertContains(response, "Bio")
+        response = await self.async_client.get(
+            reverse("about"), headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_collaborate_post_uses_sync_view(self):
+        response = self.client.post(
+            reverse("about"),
+            {"name": "Ann", "email": "ann@example.com", "message": "Hello"},
+        )
+        self.assertContains(response, "Collaboration request received!")
+        self.assertEqual(CollaborateRequest.objects.count(), 1)
+
+
+@override_settings(ADMINS=[("Owner", "owner@example.com")])
+class CollaborateRequestProcessingTests(TestCase):
+    """
+    Tests for the queued processing of collaboration requests.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def submit(self, message="Let's write a post together."):
+        data = {"name": "Ann", "email": "ann@example.com", "message": message}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse("about"), data)
+        self.assertEqual(response.status_code, 200)
+
+    def test_submission_only_queues_work(self):
+        self.submit()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(
+            Task.objects.get().name,
+            "about.tasks.process_collaborate_request",
+        )
+        call_command("run_tasks", once=True, stdout=StringIO())
+        self.assertEqual(Task.objects.get().status, DONE)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(CollaborateRequest.objects.get().spam_score, 0)
+
+    def test_duplicates_and_spam_are_not_emailed(self):
+        self.submit()
+        self.submit()
+        self.submit("FREE MONEY at https://a.example and https://b.example")
+        call_command("run_tasks", once=True, stdout=StringIO())
+        first, duplicate, spam = CollaborateRequest.objects.order_by("pk")
+        self.assertEqual(duplicate.duplicate_of, first)
+        self.assertTrue(duplicate.read)
+        self.assertGreaterEqual(spam.spam_score, SPAM_THRESHOLD)
+        self.assertTrue(spam.read)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_missing_request_is_retried(self):
+        process_collaborate_request.delay(request_id=0)
+        call_command("run_tasks", once=True, stdout=StringIO())
+        task = Task.objects.get()
+        self.assertEqual(task.status, PENDING)
+        self.assertIn("DoesNotExist", task.last_error)
+
+    def test_mark_read_action(self):
+        self.submit()
+        admin_user = User.objects.create_superuser(
+            username="owner", password="password"
+        )
+        self.client.force_login(admin_user)
+        pk = CollaborateRequest.objects.get().pk
+        self.client.post(
+            reverse("admin:about_collaboraterequest_changelist"),
+            {"action": "mark_read", "_selected_action": [pk]},
+        )
+        self.assertTrue(CollaborateRequest.objects.get().read)
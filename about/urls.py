@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+about_me = views.about_me_async if settings.ASYNC_VIEWS else views.about_me
 
 urlpatterns = [
-    path('', views.about_me, name='about'),
+    path('', about_me, name='about'),
+    path('token/', views.collaborate_token, name='collaborate_token'),
 ]
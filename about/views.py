@@ -1,9 +1,57 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render
 from django.contrib import messages
+from django.http import JsonResponse
+from django.middleware.csrf import get_token
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import condition
+from codestar.ratelimit import ratelimit
+from blog.conditional import (
+    acondition, conditional_allowed, latest, load_request_state, make_etag,
+)
 from .models import About
 from .forms import CollaborateForm
 
 
+def _validators(about):
+    if about is None:
+        return None
+    return (about.pk, about.updated_on)
+
+
+def _last_modified(request, validators):
+    if request.user.is_authenticated or validators is None:
+        return None
+    return latest(validators[1])
+
+
+def about_etag(request):
+    if not conditional_allowed(request):
+        return None
+    return make_etag(request, _validators(About.load()))
+
+
+def about_last_modified(request):
+    if not conditional_allowed(request):
+        return None
+    return _last_modified(request, _validators(About.load()))
+
+
+async def aabout_etag(request):
+    if not conditional_allowed(request):
+        return None
+    return make_etag(request, _validators(await About.aload()))
+
+
+async def aabout_last_modified(request):
+    if not conditional_allowed(request):
+        return None
+    return _last_modified(request, _validators(await About.aload()))
+
+
+@ratelimit("collaborate")
+@condition(about_etag, about_last_modified)
 def about_me(request):
     """
     Renders the About page
@@ -14,12 +62,43 @@ def about_me(request):
         if collaborate_form.is_valid():
             collaborate_form.save()
             messages.add_message(request, messages.SUCCESS, "Collaboration request received! I endeavour to respond within 2 working days.")
-    about = About.objects.all().order_by('-updated_on').first()
-    collaborate_form = CollaborateForm()
+    return _render_about(request, About.load())
 
+
+def _render_about(request, about):
     return render(
         request,
         "about/about.html",
         {"about": about,
-         "collaborate_form": collaborate_form},
+         "collaborate_form": CollaborateForm(),
+         # Anonymous pages are shared-cached, so the token is only
+         # rendered for visitors who already hold the CSRF cookie;
+         # js/collaborate.js fetches one for everybody else.
+         "csrf_cookie": settings.CSRF_COOKIE_NAME in request.COOKIES,
+         "cache_timeout": settings.BLOG_CACHE_TIMEOUT},
     )
+
+
+async def about_me_async(request):
+    """
+    Async version of :view:`about.views.about_me`, routed in its place
+    when WEB_MODE is "async". Form POSTs are served by the sync view.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return await sync_to_async(about_me)(request)
+    await sync_to_async(load_request_state)(request)
+    return await _about_read(request)
+
+
+@acondition(aabout_etag, aabout_last_modified)
+async def _about_read(request):
+    return _render_about(request, await About.aload())
+
+
+@never_cache
+def collaborate_token(request):
+    """
+    Returns a CSRF token for the collaboration form, setting the CSRF
+    cookie, for visitors served the shared-cached About page.
+    """
+    return JsonResponse({"token": get_token(request)})
@@ -1,19 +1,112 @@
 from django.contrib import admin
-from .models import Post, Comment
+from django.utils import timezone
+from django.utils.text import Truncator
+from .models import Post, Comment, PendingComment
+from .popularity import current_score
+from .search import search_posts
 from django_summernote.admin import SummernoteModelAdmin
 
 
 @admin.register(Post)
 class PostAdmin(SummernoteModelAdmin):
 
-    list_display = ('title', 'slug', 'status', 'created_on')
+    list_display = (
+        'title', 'slug', 'status', 'created_on', 'views', 'popularity',
+    )
     search_fields = ['title', 'content']
     list_filter = ('status', 'created_on')
+    list_select_related = ('stats',)
     prepopulated_fields = {'slug': ('title',)}
     summernote_fields = ('content',)
 
+    @admin.display(description='Views', ordering='stats__views')
+    def views(self, obj):
+        stats = getattr(obj, 'stats', None)
+        return stats.views if stats else 0
+
+    @admin.display(description='Popularity', ordering='stats__log_score')
+    def popularity(self, obj):
+        """The decayed score, roughly reads per half-life."""
+        stats = getattr(obj, 'stats', None)
+        score = current_score(stats and stats.log_score, timezone.now())
+        return round(score, 1)
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Search with the full-text index instead of ``ILIKE`` over every
+        post body.
+        """
+        if not search_term:
+            return queryset, False
+        return search_posts(search_term, queryset), False
+
 
 # Register your models here.
 
 
-admin.site.register(Comment)
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """
+    Comment moderation. Every bulk action is a single UPDATE or DELETE
+    that keeps ``Post.approved_comment_count`` in step.
+    """
+
+    list_display = ('short_body', 'author', 'post', 'approved', 'created_on')
+    list_filter = ('approved', 'created_on')
+    search_fields = ['body', 'author__username']
+    list_select_related = ('author', 'post')
+    raw_id_fields = ('post', 'author')
+    actions = ['approve_comments', 'unapprove_comments', 'delete_comments']
+    # Skip the unfiltered COUNT(*) over the whole table on each page.
+    show_full_result_count = False
+    body_length = 80
+
+    def get_queryset(self, request):
+        """Load only the columns the changelist shows."""
+        return super().get_queryset(request).only(
+            'body', 'approved', 'created_on',
+            'author__username', 'post__title',
+        )
+
+    def get_actions(self, request):
+        """
+        Drop the stock delete action, which loads and signals each
+        comment in turn, in favour of ``delete_comments``.
+        """
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    @admin.display(description='Body')
+    def short_body(self, obj):
+        return Truncator(obj.body).chars(self.body_length)
+
+    @admin.action(description='Approve selected comments',
+                  permissions=['change'])
+    def approve_comments(self, request, queryset):
+        changed = queryset.set_approved(True)
+        self.message_user(request, f'{changed} comment(s) approved.')
+
+    @admin.action(description='Unapprove selected comments',
+                  permissions=['change'])
+    def unapprove_comments(self, request, queryset):
+        changed = queryset.set_approved(False)
+        self.message_user(request, f'{changed} comment(s) unapproved.')
+
+    @admin.action(description='Delete selected comments',
+                  permissions=['delete'])
+    def delete_comments(self, request, queryset):
+        deleted = queryset.delete_in_bulk()
+        self.message_user(request, f'{deleted} comment(s) deleted.')
+
+
+@admin.register(PendingComment)
+class PendingCommentAdmin(CommentAdmin):
+    """
+    The moderation queue: unapproved comments, oldest first.
+    """
+
+    list_display = ('short_body', 'author', 'post', 'created_on')
+    list_filter = ('created_on',)
+    actions = ['approve_comments', 'delete_comments']
+    ordering = ('created_on', 'pk')
@@ -0,0 +1,209 @@
+"""
+Caching for the post detail page.
+
+Two layers are used:
+
+* Fragments: the masthead and post body are wrapped in ``{% cache %}``
+  tags keyed on ``(post.id, post.updated_on)``, so an edit naturally
+  moves them to a new key.
+* Full page: the complete response for anonymous readers is stored per
+  slug and served before any database work.
+
+Feeds and the sitemap are stored whole by :func:`cached_document`
+under a shared version key, so a single delete retires every copy.
+
+The conditional GET validators of :mod:`blog.conditional` are cached
+next to them. Everything stored here is read from the primary database,
+never a read replica that may not have caught up with the latest write.
+All of these are dropped by the signal handlers in :mod:`blog.signals`
+whenever a :model:`blog.Post` or :model:`blog.Comment` changes.
+"""
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from codestar.routers import primary
+
+PAGE_KEY = "blog:post_detail:{slug}"
+VALIDATORS_KEY = "blog:validators:{name}"
+LIST_VALIDATORS = "list"
+POST_VALIDATORS = "post:{slug}"
+DOCUMENT_KEY = "blog:document:{version}:{path}?{page}"
+DOCUMENTS_VERSION = "blog:documents:version"
+FRAGMENTS = ("post_masthead", "post_body")
+
+
+def page_key(slug):
+    return PAGE_KEY.format(slug=slug)
+
+
+def page_cache_allowed(request):
+    """
+    Whether the response to ``request`` may be served from, or stored in,
+    the shared full-page cache.
+
+    Only plain anonymous GETs qualify. Requests with pending flash
+    messages are skipped so the messages are not lost or shared.
+    """
+    return (
+        request.method == "GET"
+        and not request.GET
+        and not request.user.is_authenticated
+        and not len(messages.get_messages(request))
+    )
+
+
+def _page_response(cached):
+    content, content_type = cached
+    response = HttpResponse(content, content_type=content_type)
+    # The page still depends on the session for logged-in readers.
+    patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+def get_cached_page(slug):
+    """Return the cached anonymous response for ``slug``, if any."""
+    cached = cache.get(page_key(slug))
+    if cached is None:
+        return None
+    return _page_response(cached)
+
+
+async def aget_cached_page(slug):
+    """Async version of :func:`get_cached_page`."""
+    cached = await cache.aget(page_key(slug))
+    if cached is None:
+        return None
+    return _page_response(cached)
+
+
+def _page_storable(request, response):
+    """
+    Responses that set cookies or embed a CSRF token are never stored.
+    """
+    return not (
+        response.status_code != 200
+        or response.cookies
+        or request.META.get("CSRF_COOKIE_NEEDS_UPDATE")
+    )
+
+
+def set_cached_page(request, slug, response):
+    """Store ``response`` as the anonymous page for ``slug``."""
+    if _page_storable(request, response):
+        cache.set(
+            page_key(slug),
+            (response.content, response["Content-Type"]),
+            settings.BLOG_CACHE_TIMEOUT,
+        )
+
+
+async def aset_cached_page(request, slug, response):
+    """Async version of :func:`set_cached_page`."""
+    if _page_storable(request, response):
+        await cache.aset(
+            page_key(slug),
+            (response.content, response["Content-Type"]),
+            settings.BLOG_CACHE_TIMEOUT,
+        )
+
+
+def get_validators(name, compute):
+    """
+    Return the cached validators stored under ``name``.
+
+    On a miss ``compute()`` is called; it returns a tuple of values read
+    from the database, or ``None`` if the resource does not exist. Only
+    those values are stored, so every process computes the same
+    validators for the same database state.
+    """
+    key = VALIDATORS_KEY.format(name=name)
+    validators = cache.get(key)
+    if validators is None:
+        with primary():
+            values = compute()
+        if values is None:
+            return None
+        validators = tuple(values)
+        cache.set(key, validators, settings.BLOG_CACHE_TIMEOUT)
+    return validators
+
+
+async def aget_validators(name, compute):
+    """
+    Async version of :func:`get_validators`; ``compute`` is a coroutine
+    function.
+    """
+    key = VALIDATORS_KEY.format(name=name)
+    validators = await cache.aget(key)
+    if validators is None:
+        with primary():
+            values = await compute()
+        if values is None:
+            return None
+        validators = tuple(values)
+        await cache.aset(key, validators, settings.BLOG_CACHE_TIMEOUT)
+    return validators
+
+
+def cached_document(view):
+    """
+    Serve the response of ``view`` from the cache until the published
+    posts change.
+
+    Meant for the feeds and sitemap, which are the same for every visitor.
+    Only the sitemap's ``p`` page number is part of the key, so arbitrary
+    query strings cannot fill the cache.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        version = cache.get_or_set(DOCUMENTS_VERSION, time.time, None)
+        key = DOCUMENT_KEY.format(
+            version=version, path=request.path, page=request.GET.get("p", "")
+        )
+        cached = cache.get(key)
+        if cached is None:
+            with primary():
+                response = view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                if hasattr(response, "render"):
+                    response.render()
+            cached = (response.content, response["Content-Type"])
+            cache.set(key, cached, settings.BLOG_CACHE_TIMEOUT)
+        content, content_type = cached
+        return HttpResponse(content, content_type=content_type)
+    return wrapper
+
+
+def invalidate_post_pages(*slugs):
+    """Drop the full-page entries and validators for the given slugs."""
+    slugs = [slug for slug in slugs if slug]
+    cache.delete_many(
+        [page_key(slug) for slug in slugs]
+        + [
+            VALIDATORS_KEY.format(name=POST_VALIDATORS.format(slug=slug))
+            for slug in slugs
+        ]
+    )
+
+
+def invalidate_post_list():
+    """Drop the validators of the post feed and every cached document."""
+    cache.delete_many(
+        [VALIDATORS_KEY.format(name=LIST_VALIDATORS), DOCUMENTS_VERSION]
+    )
+
+
+def invalidate_post_fragments(post_id, updated_on):
+    """Drop the fragments rendered for one version of a post."""
+    cache.delete_many([
+        make_template_fragment_key(name, [post_id, updated_on.isoformat()])
+        for name in FRAGMENTS
+    ])
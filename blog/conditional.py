@@ -0,0 +1,241 @@
+"""
+ETag and Last-Modified functions for the ``condition`` decorator.
+
+Validators are built from stored timestamps and counters, never from a
+rendered response or the time they were read, and are cached by
+:func:`blog.cache.get_validators`.
+Each ETag is mixed with :func:`request_variant`, so a logged-in reader's
+page (which shows their own pending comments) never matches another
+reader's copy.
+
+Each function has an ``a``-prefixed coroutine twin for the async read
+views, used with :func:`acondition`.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib import messages
+from django.db.models import Count, Max, Q
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .cache import (
+    LIST_VALIDATORS, POST_VALIDATORS, aget_validators, get_validators,
+)
+from .models import Post
+from .popularity import apopular_posts, popular_posts
+
+
+def conditional_allowed(request):
+    """
+    Whether a 304 may be sent for ``request``.
+
+    Only GET and HEAD are considered, and never while flash messages are
+    waiting to be shown.
+    """
+    return (
+        request.method in ("GET", "HEAD")
+        and not len(messages.get_messages(request))
+    )
+
+
+def request_variant(request):
+    """
+    Identify the per-visitor parts of a page: the logged-in user and the
+    CSRF cookie that any embedded form token is derived from.
+    """
+    user = request.user.pk if request.user.is_authenticated else "anon"
+    csrf = request.COOKIES.get("csrftoken", "")
+    return f"{user}:{csrf}"
+
+
+def make_etag(request, validators):
+    raw = repr((validators, request_variant(request))).encode()
+    return hashlib.md5(raw, usedforsecurity=False).hexdigest()
+
+
+def latest(*values):
+    """
+    The newest of several datetimes, ignoring ``None``; ``None`` if all
+    of them are.
+    """
+    return max((value for value in values if value is not None), default=None)
+
+
+def load_request_state(request):
+    """
+    Evaluate the lazy user and the pending messages, which read the
+    session. Run through ``sync_to_async`` once at the top of an async
+    view; afterwards the checks in this module do no I/O.
+    """
+    request.user.is_authenticated
+    len(messages.get_messages(request))
+
+
+def acondition(etag_func=None, last_modified_func=None):
+    """
+    Async counterpart of Django's ``condition`` decorator, for async
+    views with coroutine ``etag_func`` and ``last_modified_func``. Call
+    :func:`load_request_state` first.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            etag = last_modified = None
+            if etag_func:
+                etag = await etag_func(request, *args, **kwargs)
+                etag = quote_etag(etag) if etag is not None else None
+            if last_modified_func:
+                modified = await last_modified_func(request, *args, **kwargs)
+                if modified:
+                    last_modified = int(modified.timestamp())
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                if last_modified and not response.has_header("Last-Modified"):
+                    response["Last-Modified"] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault("ETag", etag)
+            return response
+        return wrapper
+    return decorator
+
+
+def _post_detail_query(slug):
+    return (
+        Post.objects.published()
+        .filter(slug=slug)
+        .values_list(
+            "pk", "updated_on", "approved_comment_count",
+            "comments_updated_on",
+        )
+    )
+
+
+def _post_validators(slug):
+    def compute():
+        return _post_detail_query(slug).first()
+    return get_validators(POST_VALIDATORS.format(slug=slug), compute)
+
+
+async def _apost_validators(slug):
+    async def compute():
+        return await _post_detail_query(slug).afirst()
+    return await aget_validators(POST_VALIDATORS.format(slug=slug), compute)
+
+
+def _post_detail_etag(request, validators):
+    if validators is None:
+        return None
+    return make_etag(request, validators)
+
+
+def _post_detail_last_modified(request, validators):
+    """
+    Last-Modified is only sent to anonymous readers; logged-in pages
+    vary per user and rely on the ETag alone.
+    """
+    if validators is None or request.user.is_authenticated:
+        return None
+    _, updated_on, _, comments_updated_on = validators
+    return latest(updated_on, comments_updated_on)
+
+
+def post_detail_etag(request, slug):
+    if not conditional_allowed(request):
+        return None
+    return _post_detail_etag(request, _post_validators(slug))
+
+
+def post_detail_last_modified(request, slug):
+    if not conditional_allowed(request) or request.user.is_authenticated:
+        return None
+    return _post_detail_last_modified(request, _post_validators(slug))
+
+
+async def apost_detail_etag(request, slug):
+    if not conditional_allowed(request):
+        return None
+    return _post_detail_etag(request, await _apost_validators(slug))
+
+
+async def apost_detail_last_modified(request, slug):
+    if not conditional_allowed(request) or request.user.is_authenticated:
+        return None
+    return _post_detail_last_modified(
+        request, await _apost_validators(slug)
+    )
+
+
+def _list_values(stats):
+    return (stats["last_updated"], stats["total"])
+
+
+# ``last_updated`` covers drafts too, so unpublishing a post (which
+# saves it) still moves it forward.
+LIST_STATS = {
+    "last_updated": Max("updated_on"),
+    "total": Count("pk", filter=Q(status=1)),
+}
+
+
+def _list_validators():
+    def compute():
+        return _list_values(Post.objects.aggregate(**LIST_STATS))
+    return get_validators(LIST_VALIDATORS, compute)
+
+
+async def _alist_validators():
+    async def compute():
+        return _list_values(
+            await Post.objects.aaggregate(**LIST_STATS)
+        )
+    return await aget_validators(LIST_VALIDATORS, compute)
+
+
+def _list_last_modified(validators):
+    last_updated, _ = validators
+    return latest(last_updated)
+
+
+def post_list_etag(request, *args, **kwargs):
+    """The list ETag also covers the popular posts sidebar."""
+    if not conditional_allowed(request):
+        return None
+    return make_etag(request, (_list_validators(), popular_posts()))
+
+
+def post_list_last_modified(request, *args, **kwargs):
+    if not conditional_allowed(request) or request.user.is_authenticated:
+        return None
+    return _list_last_modified(_list_validators())
+
+
+async def apost_list_etag(request, *args, **kwargs):
+    if not conditional_allowed(request):
+        return None
+    return make_etag(
+        request, (await _alist_validators(), await apopular_posts())
+    )
+
+
+async def apost_list_last_modified(request, *args, **kwargs):
+    if not conditional_allowed(request) or request.user.is_authenticated:
+        return None
+    return _list_last_modified(await _alist_validators())
+
+
+def document_etag(request, *args, **kwargs):
+    """
+    Feeds and the sitemap are the same for every visitor, so their ETag
+    is not mixed with :func:`request_variant`.
+    """
+    raw = repr(_list_validators()).encode()
+    return hashlib.md5(raw, usedforsecurity=False).hexdigest()
+
+
+def document_last_modified(request, *args, **kwargs):
+    return _list_last_modified(_list_validators())
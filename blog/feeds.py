@@ -0,0 +1,53 @@
+"""
+RSS and Atom feeds of the latest published :model:`blog.Post` entries.
+
+The feeds are served through :func:`blog.cache.cached_document`, so they
+are only rebuilt after a post is published, edited or unpublished.
+"""
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from .models import Post
+
+FEED_ITEMS = 20
+
+
+class LatestPostsFeed(Feed):
+    """
+    RSS 2.0 feed of the newest :model:`blog.Post` entries.
+    """
+    title = "Code|Star blog"
+    description = "The latest posts on the Code|Star blog."
+
+    def link(self):
+        return reverse("home")
+
+    def items(self):
+        return Post.objects.published().only(
+            "title", "slug", "excerpt", "auto_excerpt",
+            "created_on", "updated_on",
+        )[:FEED_ITEMS]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.excerpt or item.auto_excerpt
+
+    def item_link(self, item):
+        return reverse("post_detail", args=[item.slug])
+
+    def item_pubdate(self, item):
+        return item.created_on
+
+    def item_updateddate(self, item):
+        return item.updated_on
+
+
+class AtomLatestPostsFeed(LatestPostsFeed):
+    """
+    The same entries as :class:`LatestPostsFeed`, as an Atom 1.0 feed.
+    """
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
@@ -0,0 +1,52 @@
+"""
+Responsive image URLs for :class:`cloudinary.models.CloudinaryField`.
+
+Building a Cloudinary URL is done in Python on every ``.url`` access, so
+the URLs for each image version are built once per process and reused.
+"""
+from functools import lru_cache
+
+from cloudinary import CloudinaryImage
+from cloudinary.models import CloudinaryField
+
+# Widths, in pixels, of the image variants offered to browsers.
+RESPONSIVE_WIDTHS = (480, 800, 1200)
+
+PLACEHOLDER = "placeholder"
+
+_field = CloudinaryField()
+
+
+def as_resource(image):
+    """
+    Return ``image`` as a :class:`cloudinary.CloudinaryResource`.
+
+    Instances not loaded from the database still hold the raw string.
+    """
+    if isinstance(image, str):
+        return _field.to_python(image)
+    return image
+
+
+def is_placeholder(image):
+    """Whether ``image`` is unset or still the default placeholder."""
+    return not image or PLACEHOLDER in (image.public_id or "")
+
+
+@lru_cache(maxsize=2048)
+def image_urls(public_id, version, format):
+    """
+    Return ``(src, srcset)`` for one version of a Cloudinary image.
+
+    Each variant is limited to its width and served in the best format
+    and quality the browser accepts.
+    """
+    image = CloudinaryImage(public_id, version=version, format=format)
+    urls = {
+        width: image.build_url(
+            width=width, crop="limit", fetch_format="auto", quality="auto"
+        )
+        for width in RESPONSIVE_WIDTHS
+    }
+    srcset = ", ".join(f"{url} {width}w" for width, url in urls.items())
+    return urls[RESPONSIVE_WIDTHS[-1]], srcset
@@ -0,0 +1,297 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+import django
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.models import Comment, Post
+from blog.popularity import uncounted
+from codestar.perf import percentile
+from codestar.webmode import async_views
+
+BENCHMARK_USER = "benchmark"
+
+
+class Command(BaseCommand):
+    """
+    Time the main views through the Django test client.
+
+    Each scenario is requested ``--requests`` times after ``--warmup``
+    untimed requests, and one further request is traced with
+    ``tracemalloc``. Latency percentiles, the query count and the bytes
+    allocated per request are reported; ``--save`` writes them to JSON
+    and ``--baseline`` fails the run if a scenario makes more queries or
+    has a p50 or peak allocation more than ``--tolerance`` above a
+    saved run (p50 is steadier between runs than the tail). p50 growth
+    under ``--min-ms`` is ignored, as fast views vary by that much
+    between runs.
+
+    Comments are written as a ``benchmark`` user, created for the run
+    and deleted again at the end; the command refuses to start if a user
+    of that name already exists. Run it against a local database filled by ``seed_blog``,
+    after ``collectstatic``.
+
+    ``--async`` repeats the read scenarios against the async views
+    through ``AsyncClient``, reported as ``<name> (async)``.
+    """
+
+    help = "Benchmark the blog and about views and compare to a baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--slug",
+            help="Post to benchmark. Defaults to the most commented one.",
+        )
+        parser.add_argument("--save", metavar="PATH")
+        parser.add_argument("--baseline", metavar="PATH")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=0.5,
+            help="Allowed fractional growth of p50 latency and peak memory.",
+        )
+        parser.add_argument(
+            "--min-ms",
+            type=float,
+            default=2.0,
+            help="p50 growth in milliseconds always allowed as noise.",
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host header to send; must be in ALLOWED_HOSTS.",
+        )
+        parser.add_argument(
+            "--async",
+            action="store_true",
+            dest="async_views",
+            help="Also benchmark the async read views.",
+        )
+
+    def handle(self, *args, **options):
+        post = self.target_post(options["slug"])
+        user = self.create_user()
+        # Rate limits stay on, so their cost is measured, but too high
+        # to be reached.
+        limits = {scope: (10 ** 9, 1) for scope in settings.RATELIMITS}
+        try:
+            # Benchmark requests are not reads of the posts.
+            with override_settings(RATELIMITS=limits), uncounted():
+                results = {
+                    name: self.measure(scenario, options)
+                    for name, scenario in self.scenarios(post, user, options)
+                }
+                if options["async_views"]:
+                    # AsyncClient always sends "Host: testserver".
+                    hosts = override_settings(
+                        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]
+                    )
+                    with async_views(), hosts:
+                        results.update(
+                            (name, self.measure(scenario, options))
+                            for name, scenario in self.async_scenarios(
+                                post, user, options
+                            )
+                        )
+        finally:
+            user.delete()
+
+        self.report(results)
+        if options["save"]:
+            with open(options["save"], "w") as output:
+                json.dump(
+                    {"meta": self.meta(options), "scenarios": results},
+                    output,
+                    indent=2,
+                )
+            self.stdout.write(f"Saved results to {options['save']}.")
+        if options["baseline"]:
+            self.compare(results, options)
+
+    def create_user(self):
+        """
+        Create the throwaway user, never reusing (and so later deleting)
+        an existing account.
+        """
+        if User.objects.filter(username=BENCHMARK_USER).exists():
+            raise CommandError(
+                f"A user named {BENCHMARK_USER!r} already exists; rename "
+                "or delete it before benchmarking."
+            )
+        return User.objects.create_user(username=BENCHMARK_USER)
+
+    def target_post(self, slug):
+        posts = Post.objects.published()
+        if slug is not None:
+            posts = posts.filter(slug=slug)
+        post = posts.order_by("-approved_comment_count", "pk").first()
+        if post is None:
+            raise CommandError(
+                "There are no published posts; run seed_blog first."
+            )
+        return post
+
+    def scenarios(self, post, user, options):
+        """
+        Yield ``(name, scenario)`` pairs. A scenario is called, untimed,
+        before each request and returns the request to time.
+        """
+        anonymous = Client(SERVER_NAME=options["host"])
+        reader = Client(SERVER_NAME=options["host"])
+        reader.force_login(user)
+        detail_url = reverse("post_detail", args=[post.slug])
+        comment = Comment.objects.create(post=post, author=user, body="Edit")
+
+        home_url = reverse("home")
+        about_url = reverse("about")
+        edit_url = reverse("comment_edit", args=[post.slug, comment.pk])
+
+        yield "home", lambda: lambda: anonymous.get(home_url)
+        yield "post_detail", lambda: lambda: anonymous.get(detail_url)
+        yield "post_detail (logged in)", lambda: lambda: reader.get(detail_url)
+        yield "comment_edit", lambda: lambda: reader.post(
+            edit_url, {"body": "Edited"}
+        )
+
+        def delete():
+            doomed = Comment.objects.create(post=post, author=user, body="x")
+            url = reverse("comment_delete", args=[post.slug, doomed.pk])
+            return lambda: reader.post(url)
+        yield "comment_delete", delete
+        yield "about", lambda: lambda: anonymous.get(about_url)
+
+    def async_scenarios(self, post, user, options):
+        """The read scenarios, sent to the async views."""
+        anonymous = AsyncClient()
+        reader = AsyncClient()
+        reader.force_login(user)
+        urls = {
+            "home": (anonymous, reverse("home")),
+            "post_detail": (
+                anonymous, reverse("post_detail", args=[post.slug])
+            ),
+            "post_detail (logged in)": (
+                reader, reverse("post_detail", args=[post.slug])
+            ),
+            "about": (anonymous, reverse("about")),
+        }
+        for name, (client, url) in urls.items():
+            yield f"{name} (async)", self.async_get(client, url)
+
+    def async_get(self, client, url):
+        async def get():
+            return await client.get(url)
+        return lambda: async_to_sync(get)
+
+    def check_response(self, response):
+        if response.status_code >= 400:
+            # WSGI environ from Client, ASGI scope from AsyncClient.
+            path = response.request.get("PATH_INFO") \
+                or response.request.get("path")
+            raise CommandError(f"{path} returned {response.status_code}.")
+        # Flash messages would otherwise pile up in the cookie.
+        response.client.cookies.pop("messages", None)
+
+    def measure(self, scenario, options):
+        cache.clear()
+        for _ in range(options["warmup"]):
+            self.check_response(scenario()())
+
+        timings = []
+        queries = []
+        for _ in range(options["requests"]):
+            send = scenario()
+            with ExitStack() as stack:
+                # Every database, read replicas included.
+                captured = [
+                    stack.enter_context(CaptureQueriesContext(conn))
+                    for conn in connections.all()
+                ]
+                start = time.perf_counter()
+                response = send()
+                timings.append(1000 * (time.perf_counter() - start))
+            queries.append(sum(map(len, captured)))
+            self.check_response(response)
+
+        send = scenario()
+        tracemalloc.start()
+        try:
+            response = send()
+            allocated, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.check_response(response)
+
+        return {
+            "p50_ms": round(percentile(timings, 0.5), 3),
+            "p95_ms": round(percentile(timings, 0.95), 3),
+            "p99_ms": round(percentile(timings, 0.99), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "queries": max(queries),
+            "allocated_kb": round(allocated / 1024, 1),
+            "peak_kb": round(peak / 1024, 1),
+        }
+
+    def meta(self, options):
+        return {
+            "vendor": connection.vendor,
+            "requests": options["requests"],
+            "python": platform.python_version(),
+            "django": django.get_version(),
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'scenario':<32} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>8} {'alloc KB':>9} {'peak KB':>9}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<32} {result['p50_ms']:>8.2f} "
+                f"{result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                f"{result['queries']:>8} {result['allocated_kb']:>9.1f} "
+                f"{result['peak_kb']:>9.1f}"
+            )
+
+    def compare(self, results, options):
+        """Raise CommandError listing every regression against --baseline."""
+        with open(options["baseline"]) as baseline_file:
+            baseline = json.load(baseline_file)["scenarios"]
+        limit = 1 + options["tolerance"]
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                continue
+            if result["queries"] > before["queries"]:
+                regressions.append(
+                    f"{name}: {result['queries']} queries, "
+                    f"was {before['queries']}"
+                )
+            slack = {"p50_ms": options["min_ms"], "peak_kb": 0}
+            for field in ("p50_ms", "peak_kb"):
+                if result[field] > before[field] * limit \
+                        and result[field] - before[field] > slack[field]:
+                    regressions.append(
+                        f"{name}: {field} {result[field]}, "
+                        f"was {before[field]}"
+                    )
+        if regressions:
+            raise CommandError(
+                "Regressions against the baseline:\n" + "\n".join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS("No regressions."))
@@ -0,0 +1,91 @@
+from contextlib import ExitStack
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.models import Post
+from blog.popularity import uncounted
+
+
+class Command(BaseCommand):
+    """
+    Print the query plan of every SELECT issued by the public views.
+
+    Each view is requested through the Django test client, with the
+    cache cleared first, while its queries are captured on every
+    database. Every query is then re-run under ``EXPLAIN ANALYZE``
+    (``EXPLAIN QUERY PLAN`` on SQLite) on the database that served it,
+    so the index usage of the real view queries can be checked.
+    """
+
+    help = "Print EXPLAIN ANALYZE output for the queries of each view."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--slug",
+            help="Post to explain post_detail with. Defaults to the newest.",
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host header to send; must be in ALLOWED_HOSTS.",
+        )
+
+    def handle(self, *args, **options):
+        slug = options["slug"]
+        if slug is None:
+            slug = (
+                Post.objects.published()
+                .values_list("slug", flat=True)
+                .first()
+            )
+        if slug is None:
+            raise CommandError("There are no published posts to explain.")
+
+        paths = [
+            ("home", reverse("home")),
+            ("home (numbered page)", reverse("home") + "?page=1"),
+            ("post_detail", reverse("post_detail", args=[slug])),
+            ("about", reverse("about")),
+        ]
+        client = Client(SERVER_NAME=options["host"])
+        for name, path in paths:
+            cache.clear()
+            with ExitStack() as stack:
+                # Every database, read replicas included.
+                captured = [
+                    stack.enter_context(CaptureQueriesContext(conn))
+                    for conn in connections.all()
+                ]
+                with uncounted():
+                    response = client.get(path)
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"{name}: GET {path} -> {response.status_code}, "
+                f"{sum(map(len, captured))} queries"
+            ))
+            for queries in captured:
+                for query in queries:
+                    self.write_plan(queries.connection, query["sql"])
+
+    def write_plan(self, connection, sql):
+        if not sql.lstrip().upper().startswith("SELECT"):
+            return
+        self.stdout.write(self.style.SQL_KEYWORD(sql))
+        for row in self.explain(connection, sql):
+            self.stdout.write("    " + " ".join(map(str, row)))
+        self.stdout.write("")
+
+    def explain(self, connection, sql):
+        """Run ``sql`` under the backend's EXPLAIN (ANALYZE) prefix."""
+        try:
+            prefix = connection.ops.explain_query_prefix(analyze=True)
+        except ValueError:
+            # Backends such as SQLite do not accept ANALYZE.
+            prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute(f"{prefix} {sql}")
+            return cursor.fetchall()
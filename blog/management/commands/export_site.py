@@ -0,0 +1,252 @@
+import hashlib
+import json
+import math
+import re
+import shutil
+from pathlib import Path
+
+from django.contrib.staticfiles.storage import (
+    ManifestFilesMixin, staticfiles_storage,
+)
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Max
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from about.models import About
+from blog.models import Post
+from blog.popularity import popular_posts, uncounted
+from blog.views import PostList
+
+MANIFEST = "manifest.json"
+# Numbered pagination links as rendered by blog/index.html.
+PAGE_LINK = re.compile(r'href="\?page=(\d+)"')
+
+
+def version(*values):
+    """A short fingerprint of the data a page was rendered from."""
+    return hashlib.md5(
+        repr(values).encode(), usedforsecurity=False
+    ).hexdigest()
+
+
+class Command(BaseCommand):
+    """
+    Export the public pages to a directory a web server or CDN can serve
+    without Django.
+
+    The home page (every numbered page, at ``/page/<n>/``), each published
+    post, the About page, both feeds and the sitemap are rendered through
+    the test client as an anonymous reader, without counting as reads
+    of the posts. Hashed static files are copied from ``STATIC_ROOT``,
+    so run ``collectstatic`` first.
+
+    ``manifest.json`` lists every URL path with its file, content type
+    and SHA-256. It also records the data each page was rendered from,
+    so later runs only re-render posts whose ``updated_on`` or approved
+    comments changed, the list pages when the published or popular posts
+    changed, and everything after a deploy changes the static files.
+    Pages that no longer exist are deleted; files whose bytes are
+    unchanged are not rewritten.
+
+    Comment forms, "load more comments" and search still need the live
+    site; route those paths to it.
+    """
+
+    help = "Render the blog to static files for a web server or CDN."
+
+    def add_arguments(self, parser):
+        parser.add_argument("output", help="Directory to export to.")
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Re-render every page, ignoring the previous manifest.",
+        )
+        parser.add_argument(
+            "--skip-static",
+            action="store_true",
+            help="Do not copy static files.",
+        )
+        parser.add_argument(
+            "--host",
+            default="localhost",
+            help="Host header to send; must be in ALLOWED_HOSTS.",
+        )
+
+    def handle(self, *args, **options):
+        self.output = Path(options["output"])
+        self.output.mkdir(parents=True, exist_ok=True)
+        self.client = Client(SERVER_NAME=options["host"])
+
+        static = {} if options["skip_static"] else self.copy_static()
+        build = version(sorted(static.items()))
+        previous = self.load_manifest()
+        old_pages = previous.get("pages", {})
+        # With --full or a new build every page is rendered again, but
+        # the old manifest still lists the files of pages now gone.
+        reuse = not options["full"] and previous.get("build") == build
+
+        pages = {}
+        rendered = 0
+        with uncounted():
+            for path, filename, page_version in self.pages():
+                old = old_pages.get(path)
+                if reuse and old is not None \
+                        and old["version"] == page_version \
+                        and (self.output / old["file"]).exists():
+                    pages[path] = old
+                    continue
+                pages[path] = self.export(path, filename, page_version)
+                rendered += 1
+
+        removed = 0
+        for path, old in old_pages.items():
+            if path not in pages:
+                (self.output / old["file"]).unlink(missing_ok=True)
+                removed += 1
+
+        manifest = {
+            "generated": timezone.now().isoformat(),
+            "build": build,
+            "pages": pages,
+            "static": static,
+        }
+        self.write(
+            MANIFEST, json.dumps(manifest, indent=2, sort_keys=True).encode()
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rendered {rendered} of {len(pages)} pages, removed {removed}, "
+            f"{len(static)} static files."
+        ))
+
+    def load_manifest(self):
+        try:
+            return json.loads((self.output / MANIFEST).read_text())
+        except FileNotFoundError:
+            return {}
+
+    def pages(self):
+        """
+        Yield ``(path, filename, version)`` for every page to export.
+        """
+        published = Post.objects.published()
+        stats = published.aggregate(
+            last_updated=Max("updated_on"), total=Count("pk")
+        )
+        # The list pages also show the popular posts sidebar.
+        list_version = version(
+            stats["last_updated"], stats["total"], popular_posts()
+        )
+
+        home = reverse("home")
+        pages = max(1, math.ceil(stats["total"] / PostList.paginate_by))
+        for number in range(1, pages + 1):
+            if number == 1:
+                yield home, "index.html", list_version
+            else:
+                yield (
+                    f"{home}page/{number}/",
+                    f"page/{number}/index.html",
+                    list_version,
+                )
+
+        posts = (
+            published.annotate(latest_comment=Max("comments__created_on"))
+            .values_list(
+                "slug", "updated_on", "approved_comment_count",
+                "latest_comment",
+            )
+            .order_by("pk")
+        )
+        for slug, *validators in posts.iterator():
+            path = reverse("post_detail", args=[slug])
+            yield path, f"{path.strip('/')}/index.html", version(*validators)
+
+        about = About.objects.order_by("-updated_on").values_list(
+            "pk", "updated_on"
+        ).first()
+        path = reverse("about")
+        yield path, f"{path.strip('/')}/index.html", version(about)
+
+        for name in ("rss_feed", "atom_feed"):
+            path = reverse(name)
+            yield path, f"{path.strip('/')}/index.xml", list_version
+        path = reverse("sitemap")
+        yield path, path.strip("/"), list_version
+
+    def export(self, path, filename, page_version):
+        """Render ``path`` into ``filename`` and return its manifest entry."""
+        url = path
+        home = reverse("home")
+        if path == home:
+            url = f"{home}?page=1"
+        elif path.startswith(f"{home}page/"):
+            url = f"{home}?page={path.split('/')[-2]}"
+
+        response = self.client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"{url} returned {response.status_code}.")
+        content = response.content
+        content_type = response["Content-Type"]
+        if content_type.startswith("text/html"):
+            content = self.rewrite_page_links(content)
+
+        self.write(filename, content)
+        return {
+            "file": filename,
+            "content_type": content_type,
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "version": page_version,
+        }
+
+    def rewrite_page_links(self, content):
+        home = reverse("home")
+
+        def link(match):
+            number = int(match[1])
+            target = home if number == 1 else f"{home}page/{number}/"
+            return f'href="{target}"'
+
+        return PAGE_LINK.sub(link, content.decode()).encode()
+
+    def write(self, filename, content):
+        """Write ``content`` unless the file already holds it."""
+        target = self.output / filename
+        if target.exists() and target.read_bytes() == content:
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(content)
+
+    def copy_static(self):
+        """
+        Copy the hashed static files, with their compressed variants,
+        from ``STATIC_ROOT``. Returns ``{url: file}``.
+        """
+        if not isinstance(staticfiles_storage, ManifestFilesMixin):
+            raise CommandError(
+                "Static files are not hashed in this configuration; "
+                "use --skip-static."
+            )
+        hashed = staticfiles_storage.hashed_files
+        if not hashed:
+            raise CommandError("No static files manifest; run collectstatic.")
+
+        source = Path(staticfiles_storage.location)
+        base_url = staticfiles_storage.base_url
+        copied = {}
+        for name in sorted(set(hashed.values())):
+            for variant in (name, f"{name}.gz", f"{name}.br"):
+                origin = source / variant
+                if not origin.exists():
+                    continue
+                filename = f"{base_url.strip('/')}/{variant}"
+                target = self.output / filename
+                stat = origin.stat()
+                if not target.exists() \
+                        or target.stat().st_size != stat.st_size \
+                        or target.stat().st_mtime < stat.st_mtime:
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(origin, target)
+                copied[f"{base_url}{variant}"] = filename
+        return copied
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Comment, Post
+
+
+class Command(BaseCommand):
+    """
+    Repair drift in ``Post.approved_comment_count``.
+
+    Posts are walked in primary key batches; within each batch only the
+    posts whose stored count differs from the real number of approved
+    comments are rewritten.
+    """
+
+    help = "Recalculate Post.approved_comment_count in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Number of posts to check per batch.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report drifted posts without updating them.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        approved = (
+            Comment.objects.filter(post=OuterRef("pk"), approved=True)
+            .order_by()
+            .values("post")
+            .annotate(count=Count("pk"))
+            .values("count")
+        )
+        actual = Coalesce(Subquery(approved), 0)
+
+        checked = repaired = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            checked += len(batch)
+
+            with transaction.atomic():
+                drifted = list(
+                    Post.objects.filter(pk__in=batch)
+                    .annotate(actual=actual)
+                    .exclude(approved_comment_count=F("actual"))
+                    .values_list("pk", flat=True)
+                )
+                if drifted and not options["dry_run"]:
+                    Post.objects.filter(pk__in=drifted).update(
+                        approved_comment_count=actual
+                    )
+            repaired += len(drifted)
+            if drifted and options["verbosity"] > 1:
+                self.stdout.write(f"Drifted posts: {drifted}")
+
+        verb = "Found" if options["dry_run"] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {repaired} of {checked} posts."
+        ))
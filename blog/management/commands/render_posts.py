@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.cache import (
+    invalidate_post_fragments, invalidate_post_list, invalidate_post_pages,
+)
+from blog.models import Post
+from blog.rendering import render_post
+from blog.search import index_post
+
+
+class Command(BaseCommand):
+    """
+    Backfill the save-time rendered fields of existing posts and refresh
+    their search index entries.
+
+    Rows are written with ``bulk_update`` so ``updated_on`` is left alone.
+    That skips the signals, so the cached fragments, pages and lists of
+    every rendered post are dropped here.
+    """
+
+    help = "Render content_html, reading_time and auto_excerpt for posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Re-render every post, not only those never rendered.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Number of posts to render per batch.",
+        )
+
+    def handle(self, *args, **options):
+        queryset = Post.objects.only(
+            "pk", "slug", "updated_on", *Post.SEARCHED_FIELDS
+        ).order_by("pk")
+        if not options["all"]:
+            queryset = queryset.filter(content_html="")
+
+        rendered = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                queryset.filter(pk__gt=last_pk)[:options["batch_size"]]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for post in batch:
+                render_post(post)
+            with transaction.atomic():
+                Post.objects.bulk_update(batch, Post.RENDERED_FIELDS)
+                for post in batch:
+                    index_post(post)
+            for post in batch:
+                invalidate_post_fragments(post.pk, post.updated_on)
+            invalidate_post_pages(*(post.slug for post in batch))
+            rendered += len(batch)
+        if rendered:
+            invalidate_post_list()
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {rendered} posts."))
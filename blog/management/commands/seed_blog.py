@@ -0,0 +1,136 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from about.models import About
+from blog.models import Comment, Post
+from blog.rendering import render_post
+from blog.search import index_post
+
+WORDS = (
+    "django query index cache template view model render request page "
+    "comment post reader author database latency python static feed "
+    "server client browser cursor session token image layout content "
+    "blog code star write deploy measure profile tune fast slow"
+).split()
+
+
+class Command(BaseCommand):
+    """
+    Fill the database with generated users, posts and comments for
+    benchmarking.
+
+    Every generated user is named ``<prefix>-user-<n>``; deleting those
+    users (``--clear``) removes their posts and comments too. The same
+    ``--seed`` always produces the same data.
+    """
+
+    help = "Seed users, posts and comments at realistic ratios."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--posts", type=int, default=500)
+        parser.add_argument(
+            "--comments-per-post",
+            type=int,
+            default=10,
+            help="Average number of comments on each post.",
+        )
+        parser.add_argument(
+            "--draft-ratio",
+            type=float,
+            default=0.1,
+            help="Share of posts left as drafts.",
+        )
+        parser.add_argument(
+            "--approved-ratio",
+            type=float,
+            default=0.8,
+            help="Share of comments that are approved.",
+        )
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete previously seeded rows with the same prefix first.",
+        )
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        seeded = User.objects.filter(username__startswith=f"{prefix}-user-")
+        if options["clear"]:
+            seeded.delete()
+        elif seeded.exists():
+            raise CommandError(
+                f"Data seeded with prefix {prefix!r} already exists; "
+                "use --clear or another --prefix."
+            )
+
+        rng = random.Random(options["seed"])
+        with transaction.atomic():
+            users = self.create_users(options)
+            posts = self.create_posts(rng, users, options)
+            comments = self.create_comments(rng, users, posts, options)
+            if not About.objects.exists():
+                About.objects.create(title="About", content=self.text(rng, 3))
+        call_command("recount_comments", stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} users, {len(posts)} posts and "
+            f"{comments} comments."
+        ))
+
+    def text(self, rng, paragraphs):
+        return "".join(
+            "<p>" + " ".join(rng.choices(WORDS, k=rng.randint(40, 120)))
+            + ".</p>"
+            for _ in range(paragraphs)
+        )
+
+    def create_users(self, options):
+        # Hashing once keeps seeding fast; every user gets the same
+        # password, "password".
+        password = make_password("password")
+        prefix = options["prefix"]
+        return User.objects.bulk_create(
+            User(username=f"{prefix}-user-{n}", password=password)
+            for n in range(options["users"])
+        )
+
+    def create_posts(self, rng, users, options):
+        prefix = options["prefix"]
+        posts = []
+        for n in range(options["posts"]):
+            post = Post(
+                title=" ".join(rng.choices(WORDS, k=5)).capitalize(),
+                slug=f"{prefix}-post-{n}",
+                author=rng.choice(users),
+                content=self.text(rng, rng.randint(3, 12)),
+                status=int(rng.random() >= options["draft_ratio"]),
+            )
+            # bulk_create skips Post.save(), so render and index here.
+            render_post(post)
+            posts.append(post)
+        posts = Post.objects.bulk_create(posts, batch_size=500)
+        for post in posts:
+            index_post(post)
+        return posts
+
+    def create_comments(self, rng, users, posts, options):
+        average = options["comments_per_post"]
+        comments = [
+            Comment(
+                post=post,
+                author=rng.choice(users),
+                body=" ".join(rng.choices(WORDS, k=rng.randint(5, 60))),
+                approved=rng.random() < options["approved_ratio"],
+            )
+            for post in posts
+            for _ in range(rng.randint(0, 2 * average))
+        ]
+        Comment.objects.bulk_create(comments, batch_size=1000)
+        return len(comments)
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.24 on 2026-10-18 16:41
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyIfPostgres(AddIndexConcurrently):
+    """
+    ``CREATE INDEX CONCURRENTLY`` on PostgreSQL, so the tables stay
+    writable while the indexes are built; a plain ``CREATE INDEX`` on
+    other databases.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        else:
+            migrations.AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        else:
+            migrations.AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('blog', '0003_post_featured_image'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='comment',
+            index=models.Index(fields=['post', 'approved', '-created_on'], name='comment_post_approved_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('approved', True)), fields=['post', '-created_on'], name='comment_post_visible_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='post',
+            index=models.Index(fields=['status', '-created_on', '-id'], name='post_status_created_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 1)), fields=['-created_on', '-id'], name='post_published_feed_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.24 on 2026-10-18 16:42
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_approved_comments(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    approved = (
+        Comment.objects.filter(post=OuterRef('pk'), approved=True)
+        .order_by()
+        .values('post')
+        .annotate(count=Count('pk'))
+        .values('count')
+    )
+    Post.objects.update(
+        approved_comment_count=Coalesce(Subquery(approved), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='approved_comment_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(
+            count_approved_comments, migrations.RunPython.noop
+        ),
+    ]
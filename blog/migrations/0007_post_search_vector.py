@@ -0,0 +1,53 @@
+# Generated by Django 4.2.24 on 2026-10-18 16:50
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Create the full-text index: a GIN index over ``search_vector`` on
+    PostgreSQL, built concurrently so posts stay writable, or the
+    ``blog_post_fts`` FTS5 table on SQLite. Posts are indexed by
+    ``0010_index_posts``.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE INDEX CONCURRENTLY blog_post_search_idx ON blog_post "
+            "USING gin (search_vector)"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE blog_post_fts "
+            "USING fts5(title, excerpt, content)"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            "DROP INDEX CONCURRENTLY IF EXISTS blog_post_search_idx"
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS blog_post_fts")
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('blog', '0006_post_rendered_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 4.2.24 on 2026-10-18 16:58
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyIfPostgres(AddIndexConcurrently):
+    """
+    As in 0004: ``CREATE INDEX CONCURRENTLY`` on PostgreSQL, so comments
+    stay writable while the index is built; a plain ``CREATE INDEX`` on
+    other databases.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        else:
+            migrations.AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+        else:
+            migrations.AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('blog', '0007_post_search_vector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingComment',
+            fields=[
+            ],
+            options={
+                'verbose_name': 'pending comment',
+                'proxy': True,
+                'indexes': [],
+                'constraints': [],
+            },
+            bases=('blog.comment',),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='comment',
+            index=models.Index(fields=['approved', 'created_on', 'id'], name='comment_approved_created_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.24 on 2026-10-18 17:18
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0008_comment_moderation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostStats',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='blog.post')),
+                ('views', models.PositiveBigIntegerField(default=0)),
+                ('log_score', models.FloatField(null=True)),
+                ('last_viewed', models.DateTimeField(null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'post stats',
+                'indexes': [models.Index(fields=['-log_score'], name='poststats_log_score_idx')],
+            },
+        ),
+    ]
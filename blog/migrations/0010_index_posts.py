@@ -0,0 +1,116 @@
+import math
+from urllib.parse import urlparse
+
+import bleach
+from bleach.css_sanitizer import CSSSanitizer
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+from django.db.models import Value
+from django.utils.text import Truncator
+
+BATCH_SIZE = 200
+
+# A frozen copy of blog.rendering and blog.search as they were when this
+# migration was written, so later changes to those modules cannot alter
+# it. Responsive image markup is left out; run ``render_posts --all`` to
+# bring old posts up to the current rendering.
+ALLOWED_TAGS = {
+    'a', 'b', 'blockquote', 'br', 'code', 'div', 'em', 'font', 'h1', 'h2',
+    'h3', 'h4', 'h5', 'h6', 'hr', 'i', 'iframe', 'img', 'li', 'ol', 'p',
+    'pre', 's', 'span', 'strike', 'strong', 'sub', 'sup', 'table', 'tbody',
+    'td', 'th', 'thead', 'tr', 'u', 'ul',
+}
+IFRAME_HOSTS = {
+    'www.youtube.com', 'www.youtube-nocookie.com', 'player.vimeo.com',
+}
+IFRAME_ATTRIBUTES = {
+    'width', 'height', 'title', 'frameborder', 'allow', 'allowfullscreen',
+}
+
+
+def iframe_attribute(tag, name, value):
+    if name == 'src':
+        url = urlparse(value)
+        return url.scheme in ('https', '') and url.netloc in IFRAME_HOSTS
+    return name in IFRAME_ATTRIBUTES or name in ('class', 'style')
+
+
+ALLOWED_ATTRIBUTES = {
+    '*': ['class', 'style'],
+    'a': ['href', 'title', 'target', 'rel'],
+    'font': ['color', 'face', 'size'],
+    'iframe': iframe_attribute,
+    'img': ['src', 'alt', 'title', 'width', 'height'],
+    'td': ['colspan', 'rowspan'],
+    'th': ['colspan', 'rowspan'],
+}
+WORDS_PER_MINUTE = 200
+EXCERPT_WORDS = 40
+FTS_TABLE = 'blog_post_fts'
+CONFIG = 'english'
+
+
+def render(post):
+    cleaner = bleach.Cleaner(
+        tags=ALLOWED_TAGS,
+        attributes=ALLOWED_ATTRIBUTES,
+        css_sanitizer=CSSSanitizer(),
+        strip=True,
+    )
+    text = bleach.clean(post.content, tags=set(), strip=True)
+    post.content_html = cleaner.clean(post.content)
+    post.reading_time = max(1, math.ceil(len(text.split()) / WORDS_PER_MINUTE))
+    post.auto_excerpt = Truncator(' '.join(text.split())).words(EXCERPT_WORDS)
+
+
+def index(post, connection):
+    title = post.title
+    excerpt = post.excerpt or post.auto_excerpt
+    body = bleach.clean(post.content, tags=set(), strip=True)
+    if connection.vendor == 'postgresql':
+        type(post).objects.using(connection.alias).filter(pk=post.pk).update(
+            search_vector=(
+                SearchVector(Value(title), weight='A', config=CONFIG)
+                + SearchVector(Value(excerpt), weight='B', config=CONFIG)
+                + SearchVector(Value(body), weight='C', config=CONFIG)
+            )
+        )
+    elif connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.pk]
+            )
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, title, excerpt, content) '
+                'VALUES (%s, %s, %s, %s)',
+                [post.pk, title, excerpt, body],
+            )
+
+
+def render_and_index(apps, schema_editor):
+    """
+    Render posts saved before ``0006_post_rendered_content`` and index
+    every post from the same text :meth:`Post.save` indexes.
+    """
+    Post = apps.get_model('blog', 'Post')
+    connection = schema_editor.connection
+    posts = Post.objects.using(connection.alias).order_by('pk')
+    for post in posts.iterator(chunk_size=BATCH_SIZE):
+        if not post.content_html:
+            render(post)
+            post.save(
+                using=connection.alias,
+                update_fields=['content_html', 'reading_time', 'auto_excerpt'],
+            )
+        index(post, connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_poststats'),
+    ]
+
+    operations = [
+        migrations.RunPython(render_and_index, migrations.RunPython.noop),
+    ]
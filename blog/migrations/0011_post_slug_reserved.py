@@ -0,0 +1,19 @@
+# Generated by Django 4.2.24 on 2026-10-18 17:41
+
+import blog.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_index_posts'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='slug',
+            field=models.SlugField(max_length=200, unique=True, validators=[blog.models.validate_post_slug]),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.24 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0011_post_slug_reserved'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comments_updated_on',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+    ]
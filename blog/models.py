@@ -1,9 +1,30 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import connections, models, router, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from cloudinary.models import CloudinaryField
 
+from .cache import invalidate_post_pages
+from .rendering import render_post
+from .search import index_post
+
 STATUS = ((0, "Draft"), (1, "Published"))
 
+# Paths routed ahead of blog.urls' post_detail pattern. A post with one
+# of these slugs could never be reached.
+RESERVED_SLUGS = {"about", "accounts", "admin", "search", "summernote"}
+
+
+def validate_post_slug(slug):
+    if slug in RESERVED_SLUGS:
+        raise ValidationError(
+            "%(slug)s is used by another page of the site.",
+            code="reserved",
+            params={"slug": slug},
+        )
+
 
 # Create your models here.
 """
@@ -11,6 +32,43 @@ Stores a single blog post entry related to :model:`auth.User`.
 """
 
 
+class PostQuerySet(models.QuerySet):
+    """
+    Query-shaping helpers for :model:`blog.Post`.
+
+    Chain these instead of repeating ``filter(status=1)`` in views so
+    every listing fetches the author in the same query and skips the
+    columns its template never reads.
+    """
+
+    # Columns rendered by the post cards in ``blog/index.html``.
+    LIST_FIELDS = (
+        "title",
+        "slug",
+        "featured_image",
+        "excerpt",
+        "auto_excerpt",
+        "created_on",
+        "author__username",
+    )
+
+    def published(self):
+        """Only posts with a Published status."""
+        return self.filter(status=1)
+
+    def with_author(self):
+        """Join the author so ``post.author`` costs no extra query."""
+        return self.select_related("author")
+
+    def for_list(self):
+        """
+        Published posts with their author, loading only the card columns.
+
+        ``content`` is deferred as it is only needed on the detail page.
+        """
+        return self.published().with_author().only(*self.LIST_FIELDS)
+
+
 class Post(models.Model):
     """
     Represents a blog post entry.
@@ -25,9 +83,21 @@ class Post(models.Model):
         status (IntegerField): Draft or Published status.
         excerpt (TextField): Optional short summary of the post.
         updated_on (DateTimeField): Timestamp when the post was last updated.
+        approved_comment_count (IntegerField): Denormalized number of
+            approved comments, maintained by :model:`blog.Comment`.
+        content_html (TextField): Sanitized ``content`` rendered on save.
+        reading_time (PositiveIntegerField): Minutes to read the post.
+        auto_excerpt (TextField): Excerpt taken from ``content``, shown
+            when ``excerpt`` is blank.
+        search_vector (SearchVectorField): Weighted full-text index
+            document, PostgreSQL only; see :mod:`blog.search`.
+        comments_updated_on (DateTimeField): When a comment on the post
+            was last added, edited or deleted.
     """
     title = models.CharField(max_length=200, unique=True)
-    slug = models.SlugField(max_length=200, unique=True)
+    slug = models.SlugField(
+        max_length=200, unique=True, validators=[validate_post_slug]
+    )
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="blog_posts"
         )
@@ -37,13 +107,174 @@ class Post(models.Model):
     status = models.IntegerField(choices=STATUS, default=0)
     excerpt = models.TextField(blank=True)
     updated_on = models.DateTimeField(auto_now=True)
+    approved_comment_count = models.IntegerField(default=0, editable=False)
+    content_html = models.TextField(blank=True, editable=False)
+    reading_time = models.PositiveIntegerField(default=0, editable=False)
+    auto_excerpt = models.TextField(blank=True, editable=False)
+    search_vector = SearchVectorField(null=True, editable=False)
+    comments_updated_on = models.DateTimeField(null=True, editable=False)
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created_on"]
+        indexes = [
+            models.Index(
+                fields=["status", "-created_on", "-id"],
+                name="post_status_created_idx",
+            ),
+            # Covers the published feed and its (created_on, id) cursor.
+            models.Index(
+                fields=["-created_on", "-id"],
+                condition=Q(status=1),
+                name="post_published_feed_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"The title of this post is {self.title}"
 
+    # Fields filled from ``content`` by :func:`blog.rendering.render_post`.
+    RENDERED_FIELDS = ("content_html", "reading_time", "auto_excerpt")
+    # Fields whose text is held in the search index.
+    SEARCHED_FIELDS = ("title", "excerpt", "content")
+
+    def save(self, *args, **kwargs):
+        """
+        Render the content once, here, rather than on every request, and
+        refresh the post's search index entry.
+        """
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            render_post(self)
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields, *self.RENDERED_FIELDS
+                }
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if update_fields is None or \
+                    set(update_fields) & set(self.SEARCHED_FIELDS):
+                index_post(self)
+
+
+class CommentQuerySet(models.QuerySet):
+    """
+    Bulk operations on :model:`blog.Comment` that keep
+    ``Post.approved_comment_count`` in step.
+    """
+
+    def visible_to(self, user):
+        """
+        Approved comments plus ``user``'s own comments awaiting approval.
+        """
+        visible = Q(approved=True)
+        if user.is_authenticated:
+            visible |= Q(author=user)
+        return self.filter(visible)
+
+    def set_approved(self, approved):
+        """
+        Approve or unapprove every comment in the queryset.
+
+        Runs as one UPDATE of the comments plus one counter UPDATE per
+        affected post, inside a single transaction. Returns the number of
+        comments whose state changed.
+        """
+        with transaction.atomic():
+            changed = list(
+                self.exclude(approved=approved)
+                .select_for_update()
+                .values_list("pk", "post_id")
+            )
+            if not changed:
+                return 0
+            self.model.objects.filter(
+                pk__in=[pk for pk, _ in changed]
+            ).update(approved=approved)
+
+            sign = 1 if approved else -1
+            per_post = {}
+            for _, post_id in changed:
+                per_post[post_id] = per_post.get(post_id, 0) + sign
+            self._posts_changed(per_post)
+        return len(changed)
+
+    def delete_in_bulk(self):
+        """
+        Delete every comment in the queryset with a single DELETE.
+
+        Unlike ``delete()``, no rows are loaded and no signals are sent;
+        the approved counts and cached pages are updated here instead.
+        Returns the number of comments deleted.
+        """
+        with transaction.atomic():
+            rows = list(
+                self.select_for_update().values_list(
+                    "pk", "post_id", "approved"
+                )
+            )
+            if not rows:
+                return 0
+            self._delete_rows([pk for pk, _, _ in rows])
+
+            per_post = {}
+            for _, post_id, approved in rows:
+                per_post[post_id] = per_post.get(post_id, 0) - approved
+            self._posts_changed(per_post)
+        return len(rows)
+
+    def _delete_rows(self, pks):
+        """
+        ``DELETE`` the comments with the given primary keys directly, as
+        ``delete()`` would load each one to send its signals.
+        """
+        opts = self.model._meta
+        connection = connections[router.db_for_write(self.model)]
+        quote = connection.ops.quote_name
+        placeholders = ", ".join(["%s"] * len(pks))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {quote(opts.db_table)} "
+                f"WHERE {quote(opts.pk.column)} IN ({placeholders})",
+                pks,
+            )
+
+    def _posts_changed(self, per_post):
+        """
+        Apply ``{post_id: delta}`` to the approved counts and drop the
+        cached pages of those posts once the transaction commits, as
+        bulk statements send no signals.
+        """
+        for post_id, delta in per_post.items():
+            adjust_approved_count(post_id, delta)
+        touch_comments(per_post)
+        slugs = list(
+            Post.objects.filter(pk__in=per_post)
+            .values_list("slug", flat=True)
+        )
+        transaction.on_commit(lambda: invalidate_post_pages(*slugs))
+
+
+def adjust_approved_count(post_id, delta):
+    """
+    Atomically add ``delta`` to a post's ``approved_comment_count``.
+    """
+    if delta:
+        Post.objects.filter(pk=post_id).update(
+            approved_comment_count=F("approved_comment_count") + delta
+        )
+
+
+def touch_comments(post_ids):
+    """
+    Stamp ``Post.comments_updated_on`` on the given posts, for the
+    conditional GET validators of :mod:`blog.conditional`.
+    """
+    Post.objects.filter(pk__in=post_ids).update(
+        comments_updated_on=timezone.now()
+    )
+
 
 class Comment(models.Model):
     """
@@ -66,8 +297,104 @@ class Comment(models.Model):
     approved = models.BooleanField(default=False)
     created_on = models.DateTimeField(auto_now_add=True)
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_on"]
+        indexes = [
+            models.Index(
+                fields=["post", "approved", "-created_on"],
+                name="comment_post_approved_idx",
+            ),
+            models.Index(
+                fields=["post", "-created_on"],
+                condition=Q(approved=True),
+                name="comment_post_visible_idx",
+            ),
+            # The admin moderation queue, filtered on approval and
+            # walked by date.
+            models.Index(
+                fields=["approved", "created_on", "id"],
+                name="comment_approved_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"Comment {self.body} by {self.author}"
+
+    def save(self, *args, **kwargs):
+        """
+        Save the comment and move ``Post.approved_comment_count`` by the
+        change in approval.
+
+        The stored row is re-read under a lock so concurrent approvals
+        and edits cannot both apply the same change.
+        """
+        with transaction.atomic():
+            previous = None
+            if not self._state.adding:
+                previous = (
+                    Comment.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list("post_id", "approved")
+                    .first()
+                )
+            super().save(*args, **kwargs)
+
+            old_post_id, was_approved = previous or (None, False)
+            if (old_post_id, was_approved) != (self.post_id, self.approved):
+                if was_approved:
+                    adjust_approved_count(old_post_id, -1)
+                if self.approved:
+                    adjust_approved_count(self.post_id, 1)
+
+
+class PendingCommentManager(models.Manager.from_queryset(CommentQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().filter(approved=False)
+
+
+class PendingComment(Comment):
+    """
+    The :model:`blog.Comment` entries still awaiting approval, as the
+    admin moderation queue.
+    """
+    objects = PendingCommentManager()
+
+    class Meta:
+        proxy = True
+        verbose_name = "pending comment"
+
+
+class PostStats(models.Model):
+    """
+    Read counts of a :model:`blog.Post`, kept off the post row so that
+    counting never changes ``updated_on`` or invalidates its caches.
+    Written in batches by :mod:`blog.popularity`.
+
+    Fields:
+        post (OneToOneField): The post counted.
+        views (PositiveBigIntegerField): Reads since the post was
+            published.
+        log_score (FloatField): Decaying popularity, as ``log2`` of the
+            score scaled to :data:`blog.popularity.EPOCH`.
+        last_viewed (DateTimeField): Time of the last write of counts.
+    """
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True,
+        related_name="stats",
+    )
+    views = models.PositiveBigIntegerField(default=0)
+    log_score = models.FloatField(null=True)
+    last_viewed = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name_plural = "post stats"
+        indexes = [
+            models.Index(
+                fields=["-log_score"], name="poststats_log_score_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.views} views of post {self.post_id}"
@@ -0,0 +1,152 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor token cannot be decoded."""
+
+
+class CursorPage:
+    """
+    A single page of results from :class:`CursorPaginator`.
+
+    Mirrors the parts of :class:`django.core.paginator.Page` used by the
+    templates, with ``next_cursor``/``previous_cursor`` tokens in place of
+    page numbers.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return f"<CursorPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset pagination over a queryset ordered newest first.
+
+    Rows are ordered by ``(key, id)`` descending, matching
+    ``Meta.ordering = ["-created_on"]`` with ``id`` as the tie-breaker.
+    Each page is fetched with a ``WHERE (key, id) < (...)`` range and a
+    ``LIMIT``, so there is no ``COUNT(*)`` and no ``OFFSET`` and deep
+    pages cost the same as the first one.
+    """
+
+    NEXT = "n"
+    PREVIOUS = "p"
+
+    def __init__(self, queryset, per_page, key="created_on"):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.key = key
+
+    def encode_cursor(self, direction, obj):
+        """Build an opaque token pointing before or after ``obj``."""
+        value = getattr(obj, self.key).isoformat()
+        raw = f"{direction}|{value}|{obj.pk}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        """Return ``(direction, key value, pk)`` for a cursor token."""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            raw = base64.urlsafe_b64decode(padded.encode()).decode()
+            direction, value, pk = raw.split("|")
+            if direction not in (self.NEXT, self.PREVIOUS):
+                raise ValueError(direction)
+            return direction, datetime.fromisoformat(value), int(pk)
+        except (TypeError, ValueError, UnicodeError) as exc:
+            raise InvalidCursor(cursor) from exc
+
+    def page(self, cursor=None):
+        """
+        Return the :class:`CursorPage` following ``cursor``.
+
+        Without a cursor the first (newest) page is returned.
+        """
+        rows, build = self._page_query(cursor)
+        return build(list(rows))
+
+    async def apage(self, cursor=None):
+        """Async version of :meth:`page`."""
+        rows, build = self._page_query(cursor)
+        return build([row async for row in rows])
+
+    def _page_query(self, cursor):
+        """
+        Return the sliced queryset for the page after ``cursor`` and a
+        function turning its rows into the :class:`CursorPage`.
+        """
+        if not cursor:
+            def build(rows):
+                return self._build_page(
+                    rows[:self.per_page],
+                    more_after=len(rows) > self.per_page,
+                    more_before=False,
+                )
+            return self._ordered(descending=True)[:self.per_page + 1], build
+
+        direction, value, pk = self.decode_cursor(cursor)
+        if direction == self.NEXT:
+            older = Q(**{f"{self.key}__lt": value}) | Q(
+                **{self.key: value, "pk__lt": pk}
+            )
+
+            def build(rows):
+                return self._build_page(
+                    rows[:self.per_page],
+                    more_after=len(rows) > self.per_page,
+                    more_before=True,
+                )
+            rows = self._ordered(descending=True).filter(older)
+            return rows[:self.per_page + 1], build
+
+        newer = Q(**{f"{self.key}__gt": value}) | Q(
+            **{self.key: value, "pk__gt": pk}
+        )
+
+        def build(rows):
+            page_rows = rows[:self.per_page]
+            page_rows.reverse()
+            return self._build_page(
+                page_rows,
+                more_after=True,
+                more_before=len(rows) > self.per_page,
+            )
+        rows = self._ordered(descending=False).filter(newer)
+        return rows[:self.per_page + 1], build
+
+    def _ordered(self, descending):
+        prefix = "-" if descending else ""
+        return self.queryset.order_by(f"{prefix}{self.key}", f"{prefix}pk")
+
+    def _build_page(self, rows, more_after, more_before):
+        next_cursor = previous_cursor = None
+        if rows and more_after:
+            next_cursor = self.encode_cursor(self.NEXT, rows[-1])
+        if rows and more_before:
+            previous_cursor = self.encode_cursor(self.PREVIOUS, rows[0])
+        return CursorPage(rows, next_cursor, previous_cursor)
@@ -0,0 +1,216 @@
+"""
+Read counts and popularity of :model:`blog.Post`.
+
+A read only adds one to an in-process counter keyed by slug, so it
+costs no query and also counts pages answered from the full-page cache
+or with a 304. Each worker writes its counts to :model:`blog.PostStats`
+at the end of a request at most every ``VIEW_FLUSH_INTERVAL`` seconds,
+in a single transaction for the whole batch. Counts still buffered when
+a worker is killed are lost, which is acceptable for a popularity
+signal. Pages rendered by the ``benchmark`` and ``export_site``
+commands run within :func:`uncounted` and are not reads.
+
+Popularity decays exponentially with a half-life of
+``POPULAR_HALF_LIFE`` hours. It is stored as ``log2`` of the score
+scaled to a fixed epoch, so rows written at different times compare
+directly and the ranking is a plain ``ORDER BY``, with nothing to decay
+in the database.
+"""
+import math
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import transaction
+from django.dispatch import receiver
+
+from .models import Post, PostStats
+
+POPULAR_KEY = "blog:popular"
+POPULAR_COUNT = 5
+POPULAR_CACHE_TIMEOUT = 5 * 60
+# Distinct slugs buffered before a flush is forced.
+MAX_PENDING = 1000
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+counting = ContextVar("counting", default=True)
+
+
+@contextmanager
+def uncounted():
+    """Do not count the post views requested inside the block."""
+    token = counting.set(False)
+    try:
+        yield
+    finally:
+        counting.reset(token)
+
+
+def half_lives(moment):
+    """Half-lives between :data:`EPOCH` and ``moment``."""
+    hours = (moment - EPOCH).total_seconds() / 3600
+    return hours / settings.POPULAR_HALF_LIFE
+
+
+def add_views(log_score, views, moment):
+    """
+    ``log_score`` with ``views`` more reads at ``moment`` added, in the
+    epoch-scaled log2 form stored on :model:`blog.PostStats`.
+    """
+    added = math.log2(views) + half_lives(moment)
+    if log_score is None:
+        return added
+    high, low = max(log_score, added), min(log_score, added)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def current_score(log_score, moment):
+    """The decayed score at ``moment``, roughly reads per half-life."""
+    if log_score is None:
+        return 0.0
+    return 2 ** (log_score - half_lives(moment))
+
+
+class ViewBuffer:
+    """
+    Thread-safe per-process read counts, by post slug.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.flushed = time.monotonic()
+
+    def record(self, slug):
+        with self.lock:
+            self.counts[slug] += 1
+
+    def take(self, force=False):
+        """
+        Return and reset the counts if a flush is due, else ``None``.
+        """
+        with self.lock:
+            due = (
+                time.monotonic() - self.flushed
+                >= settings.VIEW_FLUSH_INTERVAL
+                or len(self.counts) >= MAX_PENDING
+            )
+            if not self.counts or not (force or due):
+                return None
+            counts, self.counts = self.counts, Counter()
+            self.flushed = time.monotonic()
+            return counts
+
+
+buffer = ViewBuffer()
+
+
+def counts_views(view):
+    """
+    Count successful GETs of a post view, by its ``slug`` argument.
+
+    Wraps the outside of the view, so cached pages and 304s count too.
+    Requests made within :func:`uncounted` are skipped.
+    """
+    def counted(request, slug, response):
+        if counting.get() and request.method == "GET" \
+                and response.status_code in (200, 304):
+            buffer.record(slug)
+        return response
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, slug, *args, **kwargs):
+            response = await view(request, slug, *args, **kwargs)
+            return counted(request, slug, response)
+    else:
+        @wraps(view)
+        def wrapper(request, slug, *args, **kwargs):
+            response = view(request, slug, *args, **kwargs)
+            return counted(request, slug, response)
+    return wrapper
+
+
+def flush(force=False):
+    """
+    Write the buffered counts to :model:`blog.PostStats`. Returns the
+    number of posts updated.
+
+    Missing rows are inserted first, ignoring conflicts with other
+    workers, then every row is locked and updated, so concurrent
+    flushes never lose counts.
+    """
+    counts = buffer.take(force)
+    if not counts:
+        return 0
+    ids = dict(
+        Post.objects.published().filter(slug__in=counts)
+        .values_list("slug", "pk")
+    )
+    views = {ids[slug]: count for slug, count in counts.items()
+             if slug in ids}
+    if not views:
+        return 0
+
+    now = datetime.now(timezone.utc)
+    with transaction.atomic():
+        PostStats.objects.bulk_create(
+            [PostStats(post_id=post_id) for post_id in views],
+            ignore_conflicts=True,
+        )
+        rows = list(
+            PostStats.objects.select_for_update()
+            .filter(post_id__in=views)
+            .order_by("post_id")
+        )
+        for row in rows:
+            row.views += views[row.post_id]
+            row.log_score = add_views(row.log_score, views[row.post_id], now)
+            row.last_viewed = now
+        PostStats.objects.bulk_update(
+            rows, ["views", "log_score", "last_viewed"]
+        )
+    return len(rows)
+
+
+@receiver(request_finished)
+def flush_due_views(sender, **kwargs):
+    flush()
+
+
+def _popular_query():
+    return (
+        Post.objects.published()
+        .filter(stats__log_score__isnull=False)
+        .order_by("-stats__log_score")
+        .values("title", "slug")[:POPULAR_COUNT]
+    )
+
+
+def popular_posts():
+    """
+    The most popular published posts, as ``title`` and ``slug`` dicts,
+    cached for :data:`POPULAR_CACHE_TIMEOUT` seconds.
+    """
+    popular = cache.get(POPULAR_KEY)
+    if popular is None:
+        popular = list(_popular_query())
+        cache.set(POPULAR_KEY, popular, POPULAR_CACHE_TIMEOUT)
+    return popular
+
+
+async def apopular_posts():
+    """Async version of :func:`popular_posts`."""
+    popular = await cache.aget(POPULAR_KEY)
+    if popular is None:
+        popular = [post async for post in _popular_query()]
+        await cache.aset(POPULAR_KEY, popular, POPULAR_CACHE_TIMEOUT)
+    return popular
@@ -0,0 +1,148 @@
+"""
+Save-time rendering of :model:`blog.Post` content.
+
+Summernote HTML is sanitized with ``bleach`` once, when a post is saved,
+instead of being emitted raw with ``|safe`` on every request. Inline
+styles are kept, filtered down to safe CSS properties, as are the
+``<font>`` tags of the colour and font buttons and video embeds from
+:data:`IFRAME_HOSTS`. Embedded
+Cloudinary images are rewritten to responsive, lazily loaded variants,
+and the reading time and fallback excerpt are worked out at the same
+time.
+"""
+import math
+import re
+from urllib.parse import urlparse
+
+import bleach
+from bleach.css_sanitizer import CSSSanitizer
+from bleach.html5lib_shim import Filter
+from django.utils.text import Truncator
+
+from .images import RESPONSIVE_WIDTHS
+
+ALLOWED_TAGS = {
+    "a", "b", "blockquote", "br", "code", "div", "em", "font", "h1", "h2",
+    "h3", "h4", "h5", "h6", "hr", "i", "iframe", "img", "li", "ol", "p",
+    "pre", "s", "span", "strike", "strong", "sub", "sup", "table", "tbody",
+    "td", "th", "thead", "tr", "u", "ul",
+}
+# Hosts whose players Summernote's video button embeds.
+IFRAME_HOSTS = {
+    "www.youtube.com", "www.youtube-nocookie.com", "player.vimeo.com",
+}
+IFRAME_ATTRIBUTES = {
+    "width", "height", "title", "frameborder", "allow", "allowfullscreen",
+}
+
+
+def iframe_attribute(tag, name, value):
+    """Keep iframe attributes, with ``src`` limited to IFRAME_HOSTS."""
+    if name == "src":
+        url = urlparse(value)
+        return url.scheme in ("https", "") and url.netloc in IFRAME_HOSTS
+    return name in IFRAME_ATTRIBUTES or name in ("class", "style")
+
+
+ALLOWED_ATTRIBUTES = {
+    "*": ["class", "style"],
+    "a": ["href", "title", "target", "rel"],
+    "font": ["color", "face", "size"],
+    "iframe": iframe_attribute,
+    "img": [
+        "src", "alt", "title", "width", "height",
+        "loading", "decoding", "srcset", "sizes",
+    ],
+    "td": ["colspan", "rowspan"],
+    "th": ["colspan", "rowspan"],
+}
+
+# Images sit in a single full-width column on the detail page.
+CONTENT_IMAGE_SIZES = "(max-width: 1200px) 100vw, 1200px"
+
+WORDS_PER_MINUTE = 200
+EXCERPT_WORDS = 40
+
+CLOUDINARY_UPLOAD = re.compile(
+    r"^(?P<base>https?://res\.cloudinary\.com/[^/]+/image/upload/)"
+    r"(?P<rest>.+)$"
+)
+
+
+def cloudinary_variant(url, width):
+    """
+    The Cloudinary URL for ``url`` scaled down to ``width`` pixels, in the
+    best format the browser accepts. Other URLs are returned unchanged.
+    """
+    match = CLOUDINARY_UPLOAD.match(url)
+    if match is None:
+        return url
+    return (
+        f"{match['base']}c_limit,f_auto,q_auto,w_{width}/{match['rest']}"
+    )
+
+
+class ResponsiveImageFilter(Filter):
+    """
+    Mark every image for lazy loading and give Cloudinary images a
+    ``srcset`` of width-limited variants.
+    """
+
+    def __iter__(self):
+        for token in super().__iter__():
+            if token["type"] in ("StartTag", "EmptyTag") \
+                    and token["name"] == "img":
+                attrs = token["data"]
+                attrs[(None, "loading")] = "lazy"
+                attrs[(None, "decoding")] = "async"
+                src = attrs.get((None, "src"), "")
+                if CLOUDINARY_UPLOAD.match(src):
+                    attrs[(None, "src")] = cloudinary_variant(
+                        src, RESPONSIVE_WIDTHS[-1]
+                    )
+                    attrs[(None, "srcset")] = ", ".join(
+                        f"{cloudinary_variant(src, width)} {width}w"
+                        for width in RESPONSIVE_WIDTHS
+                    )
+                    attrs[(None, "sizes")] = CONTENT_IMAGE_SIZES
+            yield token
+
+
+cleaner = bleach.Cleaner(
+    tags=ALLOWED_TAGS,
+    attributes=ALLOWED_ATTRIBUTES,
+    css_sanitizer=CSSSanitizer(),
+    strip=True,
+    filters=[ResponsiveImageFilter],
+)
+
+
+def render_content(html):
+    """Sanitize Summernote HTML and make its images responsive."""
+    return cleaner.clean(html)
+
+
+def plain_text(html):
+    """The text of ``html`` with every tag removed."""
+    return bleach.clean(html, tags=set(), strip=True)
+
+
+def reading_time(text):
+    """Minutes needed to read ``text``, rounded up, at least one."""
+    return max(1, math.ceil(len(text.split()) / WORDS_PER_MINUTE))
+
+
+def make_excerpt(text):
+    return Truncator(" ".join(text.split())).words(EXCERPT_WORDS)
+
+
+def render_post(post):
+    """
+    Fill the rendered fields of ``post`` from its ``content``.
+
+    Nothing is saved; callers persist the fields.
+    """
+    text = plain_text(post.content)
+    post.content_html = render_content(post.content)
+    post.reading_time = reading_time(text)
+    post.auto_excerpt = make_excerpt(text)
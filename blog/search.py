@@ -0,0 +1,133 @@
+"""
+Full-text search over :model:`blog.Post`.
+
+On PostgreSQL each post keeps a weighted ``search_vector`` (title above
+excerpt above body) behind a GIN index. On SQLite, used for local
+development and tests, the same text is kept in the ``blog_post_fts``
+FTS5 table and ranked with ``bm25``. Both index the same text, from
+:func:`index_text`. They are created by migration
+``0007_post_search_vector``, filled by ``0010_index_posts`` and kept up
+to date by :meth:`Post.save` and the ``render_posts`` command.
+"""
+import re
+
+from django.contrib.postgres.search import (
+    SearchQuery, SearchRank, SearchVector,
+)
+from django.db import connections, router
+from django.db.models import Case, F, IntegerField, Q, Value, When
+
+from .rendering import plain_text
+
+FTS_TABLE = "blog_post_fts"
+# bm25 column weights for title, excerpt and content.
+FTS_WEIGHTS = (10.0, 4.0, 1.0)
+# Cap on SQLite matches, which are handed back to the ORM as a list of ids.
+FTS_MAX_RESULTS = 1000
+CONFIG = "english"
+
+
+def _vendor(model):
+    return connections[router.db_for_write(model)].vendor
+
+
+def index_text(post):
+    """
+    The title, excerpt and body text indexed for ``post``. The body is
+    taken from ``content`` with the markup removed, so it does not
+    depend on the rendered fields having been filled.
+    """
+    return (
+        post.title,
+        post.excerpt or post.auto_excerpt,
+        plain_text(post.content),
+    )
+
+
+def search_vector(title, excerpt, body):
+    return (
+        SearchVector(Value(title), weight="A", config=CONFIG)
+        + SearchVector(Value(excerpt), weight="B", config=CONFIG)
+        + SearchVector(Value(body), weight="C", config=CONFIG)
+    )
+
+
+def index_post(post, using=None):
+    """Refresh the search index entry of a saved post."""
+    model = type(post)
+    using = using or router.db_for_write(model)
+    vendor = connections[using].vendor
+    text = index_text(post)
+    if vendor == "postgresql":
+        model._base_manager.using(using).filter(pk=post.pk).update(
+            search_vector=search_vector(*text)
+        )
+    elif vendor == "sqlite":
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post.pk]
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, excerpt, content) "
+                "VALUES (%s, %s, %s, %s)",
+                [post.pk, *text],
+            )
+
+
+def unindex_post(model, post_id):
+    """Remove a deleted post from the SQLite index."""
+    if _vendor(model) == "sqlite":
+        using = router.db_for_write(model)
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [post_id]
+            )
+
+
+def fts_query(text):
+    """
+    Turn reader input into an FTS5 query matching every word, so FTS5
+    operators typed by readers are searched for rather than parsed.
+    """
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"' for word in words)
+
+
+def search_posts(text, queryset):
+    """
+    Filter ``queryset`` to posts matching ``text``, best matches first.
+    """
+    vendor = _vendor(queryset.model)
+    if vendor == "postgresql":
+        query = SearchQuery(text, search_type="websearch", config=CONFIG)
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(rank=SearchRank(F("search_vector"), query))
+            .order_by("-rank", "-created_on")
+        )
+
+    if vendor != "sqlite":
+        # No search index on other backends.
+        return queryset.filter(
+            Q(title__icontains=text) | Q(content__icontains=text)
+        )
+
+    match = fts_query(text)
+    if not match:
+        return queryset.none()
+
+    using = router.db_for_read(queryset.model)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+            f"ORDER BY bm25({FTS_TABLE}, %s, %s, %s) LIMIT %s",
+            [match, *FTS_WEIGHTS, FTS_MAX_RESULTS],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+    if not ids:
+        return queryset.none()
+    order = Case(
+        *[When(pk=pk, then=Value(rank)) for rank, pk in enumerate(ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(pk__in=ids).annotate(rank=order).order_by("rank")
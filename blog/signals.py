@@ -0,0 +1,133 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import (
+    invalidate_post_fragments,
+    invalidate_post_list,
+    invalidate_post_pages,
+)
+from .models import (
+    Comment, PendingComment, Post, adjust_approved_count, touch_comments,
+)
+from .search import unindex_post
+
+
+def cascaded_from_post(origin):
+    """
+    Whether a delete started from a post, or a queryset of posts, whose
+    own handlers drop everything cached for them.
+    """
+    return isinstance(origin, Post) or getattr(origin, "model", None) is Post
+
+
+def first_for_post(origin, post_id):
+    """
+    Whether ``post_id`` is reached for the first time by the delete that
+    started from ``origin``. Saves have no origin and always are.
+
+    The posts seen are noted on ``origin``, like ``_cached_as`` below,
+    until the delete's transaction commits.
+    """
+    if origin is None:
+        return True
+    seen = origin.__dict__.get("_comment_posts")
+    if seen is None:
+        seen = origin._comment_posts = set()
+        transaction.on_commit(lambda: origin.__dict__.pop("_comment_posts"))
+    if post_id in seen:
+        return False
+    seen.add(post_id)
+    return True
+
+
+# Signals name the proxy class as sender when a PendingComment is saved
+# or deleted in the admin, so the comment receivers listen for both.
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=PendingComment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    """
+    Drop a deleted approved comment from its post's counter.
+
+    Handled as a signal rather than in ``Comment.delete()`` so queryset
+    deletes are counted too. Comments deleted along with their post are
+    skipped, as the counter goes with it.
+    """
+    if instance.approved and not cascaded_from_post(origin):
+        adjust_approved_count(instance.post_id, -1)
+
+
+@receiver(pre_save, sender=Post)
+def remember_cached_post(sender, instance, **kwargs):
+    """
+    Note the slug and timestamp the cached copies of a post were stored
+    under, and whether it was published, before the save changes them.
+    """
+    instance._cached_as = None
+    if instance.pk is not None:
+        instance._cached_as = (
+            Post.objects.filter(pk=instance.pk)
+            .values_list("slug", "updated_on", "status")
+            .first()
+        )
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, **kwargs):
+    """
+    Invalidate the page and fragments of an edited post, and the list,
+    feeds and sitemap if it is or was published.
+    """
+    previous = getattr(instance, "_cached_as", None)
+    slugs = [instance.slug]
+    was_published = False
+    if previous is not None:
+        old_slug, old_updated_on, old_status = previous
+        slugs.append(old_slug)
+        was_published = old_status == 1
+        transaction.on_commit(
+            lambda: invalidate_post_fragments(instance.pk, old_updated_on)
+        )
+    transaction.on_commit(lambda: invalidate_post_pages(*slugs))
+    if instance.status == 1 or was_published:
+        transaction.on_commit(invalidate_post_list)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Invalidate every cached copy of a deleted post."""
+    post_id, slug, updated_on = instance.pk, instance.slug, instance.updated_on
+    transaction.on_commit(lambda: invalidate_post_pages(slug))
+    transaction.on_commit(
+        lambda: invalidate_post_fragments(post_id, updated_on)
+    )
+    if instance.status == 1:
+        transaction.on_commit(invalidate_post_list)
+    unindex_post(sender, post_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=PendingComment)
+@receiver(post_delete, sender=PendingComment)
+def comment_changed(sender, instance, origin=None, **kwargs):
+    """
+    Invalidate the page showing a new, edited or deleted comment.
+
+    Comments deleted along with their post are left to
+    :func:`post_deleted`, and a delete reaching many comments of one
+    post (say with their author) handles that post once.
+    """
+    post_id = instance.post_id
+    if cascaded_from_post(origin) or not first_for_post(origin, post_id):
+        return
+    touch_comments([post_id])
+    if Comment.post.is_cached(instance):
+        slug = instance.post.slug
+    else:
+        slug = (
+            Post.objects.filter(pk=post_id)
+            .values_list("slug", flat=True)
+            .first()
+        )
+    transaction.on_commit(lambda: invalidate_post_pages(slug))
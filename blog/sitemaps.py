@@ -0,0 +1,26 @@
+"""
+Sitemap of every published :model:`blog.Post`.
+
+Only ``slug`` and ``updated_on`` are loaded. The sitemap is served
+through :func:`blog.cache.cached_document` like the feeds.
+"""
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+
+from .models import Post
+
+
+class PostSitemap(Sitemap):
+    changefreq = "weekly"
+
+    def items(self):
+        return Post.objects.published().only("slug", "updated_on")
+
+    def location(self, item):
+        return reverse("post_detail", args=[item.slug])
+
+    def lastmod(self, item):
+        return item.updated_on
+
+
+sitemaps = {"posts": PostSitemap}
@@ -0,0 +1,34 @@
+from django import template
+
+from blog.images import as_resource, image_urls, is_placeholder
+
+register = template.Library()
+
+
+@register.inclusion_tag("blog/includes/responsive_image.html")
+def responsive_image(image, alt, default, css_class="", sizes="100vw",
+                     loading="lazy"):
+    """
+    Render an ``<img>`` for a Cloudinary image with a width ``srcset``.
+
+    Usage::
+
+        {% responsive_image post.featured_image post.title "images/default.jpg" css_class="scale" sizes="50vw" %}
+
+    ``default`` is the static file shown while the image is still the
+    placeholder. Pass ``loading="eager"`` for images above the fold.
+    """
+    image = as_resource(image)
+    context = {
+        "alt": alt,
+        "css_class": css_class,
+        "loading": loading,
+        "sizes": sizes,
+        "default": default,
+        "placeholder": is_placeholder(image),
+    }
+    if not context["placeholder"]:
+        context["src"], context["srcset"] = image_urls(
+            image.public_id, image.version, image.format
+        )
+    return context
@@ -1,3 +1,1206 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+import cloudinary
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.template import Context, Template
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from codestar.routers import PIN_COOKIE
+from codestar.webmode import async_views
+
+from .images import image_urls
+from .management.commands.benchmark import Command as BenchmarkCommand
+from .models import Comment, PendingComment, Post, PostStats
+from .popularity import add_views, buffer, current_score, flush
+from .rendering import render_content
+from .views import PostList
+
+
+class PostQuerySetTests(TestCase):
+    """
+    Tests for the query-shaping helpers on :model:`blog.Post`.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="password"
+        )
+        cls.published = Post.objects.create(
+            title="Published", slug="published", author=cls.author,
+            content="Body", status=1,
+        )
+        cls.draft = Post.objects.create(
+            title="Draft", slug="draft", author=cls.author,
+            content="Body", status=0,
+        )
+
+    def test_published_excludes_drafts(self):
+        self.assertQuerySetEqual(
+            Post.objects.published(), [self.published]
+        )
+
+    def test_for_list_defers_content(self):
+        post = Post.objects.for_list().get()
+        self.assertIn("content", post.get_deferred_fields())
+        with self.assertNumQueries(0):
+            self.assertEqual(post.author.username, "author")
+
+
+class PostListQueryCountTests(TestCase):
+    """
+    Guards the home page against per-post queries creeping back in.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="password"
+        )
+        for i in range(12):
+            Post.objects.create(
+                title=f"Post {i}", slug=f"post-{i}", author=cls.author,
+                content="Body", excerpt="Excerpt", status=1,
+            )
+
+    def test_query_count_is_independent_of_page_size(self):
+        # Cursor pages need a single SELECT; numbered pages add a COUNT.
+        # Warm the cached conditional GET validators first.
+        self.client.get(reverse("home"))
+        for paginate_by in (1, 6, 12):
+            for query, expected in (({}, 1), ({"page": 1}, 2)):
+                with self.subTest(paginate_by=paginate_by, query=query):
+                    with mock.patch.object(
+                        PostList, "paginate_by", paginate_by
+                    ):
+                        with self.assertNumQueries(expected):
+                            response = self.client.get(
+                                reverse("home"), query
+                            )
+                    self.assertEqual(
+                        len(response.context["post_list"]), paginate_by
+                    )
+
+
+class CursorPaginationTests(TestCase):
+    """
+    Tests for keyset pagination of the post feed.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="password"
+        )
+        for i in range(7):
+            Post.objects.create(
+                title=f"Post {i}", slug=f"post-{i}", author=cls.author,
+                content="Body", status=1,
+            )
+        # Give several posts the same timestamp to exercise the id
+        # tie-breaker.
+        first = Post.objects.order_by("pk").first()
+        Post.objects.filter(pk__lte=first.pk + 3).update(
+            created_on=first.created_on
+        )
+        cls.expected = list(
+            Post.objects.order_by("-created_on", "-pk")
+            .values_list("slug", flat=True)
+        )
+
+    def slugs(self, response):
+        return [post.slug for post in response.context["post_list"]]
+
+    def test_walks_forwards_and_backwards(self):
+        with mock.patch.object(PostList, "paginate_by", 3):
+            first = self.client.get(reverse("home"))
+            page = first.context["page_obj"]
+            self.assertFalse(page.has_previous())
+            self.assertEqual(self.slugs(first), self.expected[:3])
+
+            second = self.client.get(
+                reverse("home"), {"cursor": page.next_cursor}
+            )
+            self.assertEqual(self.slugs(second), self.expected[3:6])
+
+            third = self.client.get(
+                reverse("home"),
+                {"cursor": second.context["page_obj"].next_cursor},
+            )
+            self.assertEqual(self.slugs(third), self.expected[6:])
+            self.assertFalse(third.context["page_obj"].has_next())
+
+            back = self.client.get(
+                reverse("home"),
+                {"cursor": third.context["page_obj"].previous_cursor},
+            )
+            self.assertEqual(self.slugs(back), self.expected[3:6])
+            self.assertContains(back, "?cursor=")
+
+    def test_invalid_cursor_is_404(self):
+        response = self.client.get(reverse("home"), {"cursor": "bogus"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_numbers_still_work(self):
+        with mock.patch.object(PostList, "paginate_by", 3):
+            response = self.client.get(reverse("home"), {"page": 2})
+        self.assertEqual(self.slugs(response), self.expected[3:6])
+        self.assertContains(response, "?page=3")
+
+
+class ApprovedCommentCountTests(TestCase):
+    """
+    Tests that ``Post.approved_comment_count`` follows comment changes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="commenter", password="password"
+        )
+        cls.post = Post.objects.create(
+            title="Post", slug="post", author=cls.user,
+            content="Body", status=1,
+        )
+
+    def count(self):
+        self.post.refresh_from_db()
+        return self.post.approved_comment_count
+
+    def add_comment(self, approved=False):
+        return Comment.objects.create(
+            post=self.post, author=self.user, body="Hi", approved=approved
+        )
+
+    def test_create_and_approve(self):
+        self.add_comment(approved=True)
+        comment = self.add_comment()
+        self.assertEqual(self.count(), 1)
+        comment.approved = True
+        comment.save()
+        self.assertEqual(self.count(), 2)
+        comment.save()
+        self.assertEqual(self.count(), 2)
+
+    def test_edit_resets_approval(self):
+        comment = self.add_comment(approved=True)
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse("comment_edit", args=[self.post.slug, comment.pk]),
+            {"body": "Edited"},
+        )
+        self.assertEqual(self.count(), 0)
+
+    def test_deletes(self):
+        first = self.add_comment(approved=True)
+        self.add_comment(approved=True)
+        self.add_comment()
+        self.client.force_login(self.user)
+        self.client.post(
+            reverse("comment_delete", args=[self.post.slug, first.pk])
+        )
+        self.assertEqual(self.count(), 1)
+        Comment.objects.all().delete()
+        self.assertEqual(self.count(), 0)
+
+    def test_post_delete_skips_counter_updates(self):
+        queries = []
+        for count in (1, 4):
+            post = Post.objects.create(
+                title=f"Doomed {count}", slug=f"doomed-{count}",
+                author=self.user, content="Body", status=1,
+            )
+            for _ in range(count):
+                Comment.objects.create(
+                    post=post, author=self.user, body="Hi", approved=True
+                )
+            with CaptureQueriesContext(connection) as captured:
+                post.delete()
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+
+    def test_bulk_set_approved(self):
+        for _ in range(3):
+            self.add_comment()
+        self.assertEqual(Comment.objects.set_approved(True), 3)
+        self.assertEqual(self.count(), 3)
+        self.assertEqual(Comment.objects.set_approved(True), 0)
+        Comment.objects.all()[:1].get().delete()
+        Comment.objects.set_approved(False)
+        self.assertEqual(self.count(), 0)
+
+    def test_recount_repairs_drift(self):
+        self.add_comment(approved=True)
+        Post.objects.update(approved_comment_count=7)
+        out = StringIO()
+        call_command("recount_comments", "--batch-size", "1", stdout=out)
+        self.assertIn("Repaired 1 of 1 posts", out.getvalue())
+        self.assertEqual(self.count(), 1)
+
+
+class PostDetailCacheTests(TestCase):
+    """
+    Tests for the anonymous full-page cache of ``post_detail``.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="reader", password="password"
+        )
+        cls.post = Post.objects.create(
+            title="Cached", slug="cached", author=cls.user,
+            content="<p>Original body</p>", status=1,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("post_detail", args=[self.post.slug])
+
+    def test_anonymous_hit_makes_no_queries(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Original body")
+        self.assertIn("Cookie", response["Vary"])
+
+    def test_post_edit_invalidates(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.content = "<p>Edited body</p>"
+            self.post.save()
+        self.assertContains(self.client.get(self.url), "Edited body")
+
+    def test_comment_approval_invalidates(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, body="A comment"
+        )
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.filter(pk=comment.pk).set_approved(True)
+        response = self.client.get(self.url)
+        self.assertEqual(response.context["comment_count"], 1)
+
+    def test_deleting_a_commenter_handles_each_post_once(self):
+        queries = []
+        for count in (1, 4):
+            commenter = User.objects.create_user(username=f"c{count}")
+            for _ in range(count):
+                Comment.objects.create(
+                    post=self.post, author=commenter, body="Pending"
+                )
+            with CaptureQueriesContext(connection) as captured:
+                commenter.delete()
+            queries.append(len(captured))
+        self.assertEqual(queries[0], queries[1])
+
+    def test_logged_in_readers_bypass_cache(self):
+        self.client.get(self.url)
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertIsNotNone(response.context)
+
+
+class ConditionalGetTests(TestCase):
+    """
+    Tests for ETag/Last-Modified handling on the blog views.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="reader", password="password"
+        )
+        cls.post = Post.objects.create(
+            title="Fresh", slug="fresh", author=cls.user,
+            content="Body", status=1,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertRevalidates(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        return etag
+
+    def test_post_detail_and_list_revalidate(self):
+        self.assertRevalidates(reverse("home"))
+        self.assertRevalidates(reverse("post_detail", args=["fresh"]))
+
+    def test_last_modified_for_anonymous_only(self):
+        url = reverse("post_detail", args=["fresh"])
+        response = self.client.get(url)
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+        self.client.force_login(self.user)
+        self.assertFalse(self.client.get(url).has_header("Last-Modified"))
+
+    def test_etag_varies_per_user(self):
+        url = reverse("post_detail", args=["fresh"])
+        anonymous = self.assertRevalidates(url)
+        self.client.force_login(self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=anonymous)
+        self.assertEqual(response.status_code, 200)
+
+    def test_comment_changes_etag(self):
+        url = reverse("post_detail", args=["fresh"])
+        etag = self.assertRevalidates(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                post=self.post, author=self.user, body="New", approved=True
+            )
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_comment_edit_changes_etag(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, body="Old", approved=True
+        )
+        url = reverse("post_detail", args=["fresh"])
+        etag = self.assertRevalidates(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.body = "Edited"
+            comment.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_validators_only_depend_on_the_database(self):
+        for url in (reverse("home"), reverse("post_detail", args=["fresh"])):
+            first = self.client.get(url)
+            cache.clear()
+            second = self.client.get(url)
+            self.assertEqual(first["ETag"], second["ETag"])
+            self.assertEqual(first["Last-Modified"], second["Last-Modified"])
+
+
+class CommentSubmissionTests(TestCase):
+    """
+    Tests for redirect-after-post and the background comment endpoint.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="commenter", password="password"
+        )
+        cls.post = Post.objects.create(
+            title="Post", slug="post", author=cls.user,
+            content="Body", status=1,
+        )
+
+    def setUp(self):
+        # Rate-limit buckets live in the cache.
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_post_detail_redirects_after_post(self):
+        url = reverse("post_detail", args=["post"])
+        response = self.client.post(url, {"body": "Hello"})
+        self.assertRedirects(response, url)
+        self.assertEqual(self.post.comments.count(), 1)
+
+    def test_ajax_create_returns_fragment(self):
+        response = self.client.post(
+            reverse("comment_create", args=["post"]), {"body": "Hello"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn("awaiting approval", response.json()["html"])
+        self.assertEqual(self.post.comments.get().body, "Hello")
+
+    def test_ajax_create_reports_errors(self):
+        response = self.client.post(
+            reverse("comment_create", args=["post"]), {"body": ""},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("body", response.json()["errors"])
+
+    # The default database stands in for a replica.
+    @override_settings(REPLICAS=["default"])
+    def test_delete_is_post_only_and_pins_to_primary(self):
+        comment = Comment.objects.create(
+            post=self.post, author=self.user, body="Doomed"
+        )
+        url = reverse("comment_delete", args=["post", comment.pk])
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertTrue(Comment.objects.filter(pk=comment.pk).exists())
+
+        response = self.client.post(url)
+        self.assertRedirects(
+            response, reverse("post_detail", args=["post"]),
+            fetch_redirect_response=False,
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertFalse(Comment.objects.filter(pk=comment.pk).exists())
+
+    def test_anonymous_cannot_comment(self):
+        self.client.logout()
+        response = self.client.post(
+            reverse("comment_create", args=["post"]), {"body": "Hello"},
+            HTTP_X_REQUESTED_WITH="XMLHttpRequest",
+        )
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(self.post.comments.exists())
+
+
+class CommentVisibilityTests(TestCase):
+    """
+    Tests that readers are only sent comments they are allowed to see.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="password"
+        )
+        cls.other = User.objects.create_user(
+            username="other", password="password"
+        )
+        cls.post = Post.objects.create(
+            title="Post", slug="post", author=cls.author,
+            content="Body", status=1,
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.author, body="Approved", approved=True
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.author, body="Mine pending"
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.other, body="Spam pending"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("post_detail", args=["post"])
+
+    def test_anonymous_sees_only_approved(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, "Approved")
+        self.assertNotContains(response, "pending")
+
+    def test_author_sees_own_pending(self):
+        self.client.force_login(self.author)
+        response = self.client.get(self.url)
+        self.assertContains(response, "Mine pending")
+        self.assertNotContains(response, "Spam pending")
+
+    @override_settings(BLOG_COMMENTS_PER_PAGE=1)
+    def test_comments_load_in_chunks(self):
+        self.client.force_login(self.author)
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.context["comments"]), 1)
+        next_cursor = response.context["comments"].next_cursor
+
+        data = self.client.get(
+            reverse("comment_list", args=["post"]), {"cursor": next_cursor}
+        ).json()
+        self.assertIn("Approved", data["html"])
+        self.assertIsNone(data["next_url"])
+
+
+class RenderingTests(TestCase):
+    """
+    Tests for the save-time rendering of post content.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="password"
+        )
+
+    def test_content_is_sanitized(self):
+        html = render_content(
+            '<p onclick="steal()">Hi<script>alert(1)</script></p>'
+        )
+        self.assertNotIn("onclick", html)
+        self.assertNotIn("<script>", html)
+
+    def test_styles_fonts_and_video_embeds_are_kept(self):
+        html = render_content(
+            '<p style="color: red; position: fixed">'
+            '<font color="blue">Hi</font></p>'
+            '<iframe src="//www.youtube.com/embed/x" width="640"></iframe>'
+            '<iframe src="https://evil.example/x"></iframe>'
+        )
+        self.assertIn('style="color: red;"', html)
+        self.assertIn('<font color="blue">', html)
+        self.assertIn('src="//www.youtube.com/embed/x" width="640"', html)
+        self.assertNotIn("evil.example", html)
+
+    def test_cloudinary_images_are_responsive(self):
+        html = render_content(
+            '<img src="https://res.cloudinary.com/demo/image/upload/'
+            'v1/cat.jpg">'
+        )
+        self.assertIn('loading="lazy"', html)
+        self.assertIn("c_limit,f_auto,q_auto,w_480/v1/cat.jpg 480w", html)
+
+    def test_content_sanitized_to_nothing_is_never_shown_raw(self):
+        post = Post.objects.create(
+            title="Empty", slug="empty", author=self.author,
+            content='<script src="https://evil.example/x.js"></script>',
+            status=1,
+        )
+        self.assertEqual(post.content_html, "")
+        response = self.client.get(reverse("post_detail", args=[post.slug]))
+        self.assertNotContains(response, "evil.example")
+
+    def test_save_fills_rendered_fields(self):
+        post = Post.objects.create(
+            title="Post", slug="post", author=self.author,
+            content="<p>" + "word " * 450 + "</p>", status=1,
+        )
+        self.assertEqual(post.reading_time, 3)
+        self.assertTrue(post.auto_excerpt.endswith("…"))
+        self.assertTrue(post.content_html.startswith("<p>word"))
+
+    def test_backfill_command(self):
+        post = Post.objects.create(
+            title="Post", slug="post", author=self.author,
+            content="<p>Text</p>", status=1,
+        )
+        Post.objects.update(content_html="", reading_time=0)
+        call_command("render_posts", stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.content_html, "<p>Text</p>")
+        self.assertEqual(post.reading_time, 1)
+
+    def test_backfill_command_invalidates_cached_copies(self):
+        post = Post.objects.create(
+            title="Post", slug="post", author=self.author,
+            content="<p>Original wording</p>", status=1,
+        )
+        url = reverse("post_detail", args=[post.slug])
+        cache.clear()
+        self.assertContains(self.client.get(url), "Original wording")
+        Post.objects.update(content="<p>Revised wording</p>")
+        call_command("render_posts", "--all", stdout=StringIO())
+        self.assertContains(self.client.get(url), "Revised wording")
+
+
+class ResponsiveImageTagTests(TestCase):
+    """
+    Tests for the ``responsive_image`` template tag.
+    """
+
+    template = Template(
+        '{% load blog_images %}'
+        '{% responsive_image post.featured_image post.title '
+        '"images/default.jpg" %}'
+    )
+
+    def setUp(self):
+        # Image URLs need a cloud name, which CLOUDINARY_URL may not set.
+        config = cloudinary.config()
+        self.addCleanup(cloudinary.config, cloud_name=config.cloud_name)
+        cloudinary.config(cloud_name="demo")
+        image_urls.cache_clear()
+
+    def render(self, image):
+        post = Post(title="Cat", featured_image=image)
+        return self.template.render(Context({"post": post}))
+
+    def test_placeholder_uses_static_default(self):
+        html = self.render("placeholder")
+        self.assertIn(staticfiles_storage.url("images/default.jpg"), html)
+        self.assertNotIn("srcset", html)
+
+    def test_image_gets_cached_srcset(self):
+        html = self.render("image/upload/v123/cat.jpg")
+        self.assertIn('loading="lazy"', html)
+        self.assertIn("w_480/v123/cat.jpg 480w", html)
+        self.render("image/upload/v123/cat.jpg")
+        self.assertEqual(image_urls.cache_info().hits, 1)
+
+
+class SearchTests(TestCase):
+    """
+    Tests for full-text post search.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="password"
+        )
+        cls.in_title = Post.objects.create(
+            title="Django caching", slug="django-caching",
+            author=cls.author, content="<p>Notes</p>", status=1,
+        )
+        cls.in_body = Post.objects.create(
+            title="Performance notes", slug="performance-notes",
+            author=cls.author, content="<p>Some caching tips</p>", status=1,
+        )
+        Post.objects.create(
+            title="Draft caching", slug="draft-caching",
+            author=cls.author, content="<p>Unpublished</p>", status=0,
+        )
+
+    def search(self, query):
+        response = self.client.get(reverse("search"), {"q": query})
+        return [post.slug for post in response.context["post_list"]]
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(
+            self.search("caching"), ["django-caching", "performance-notes"]
+        )
+
+    def test_index_follows_edits_and_deletes(self):
+        self.in_body.content = "<p>Nothing relevant</p>"
+        self.in_body.save()
+        self.assertEqual(self.search("caching"), ["django-caching"])
+        self.in_title.delete()
+        self.assertEqual(self.search("caching"), [])
+
+    def test_operators_are_treated_as_words(self):
+        self.assertEqual(self.search('caching" OR *'), [])
+
+    def test_post_cannot_take_the_search_slug(self):
+        post = Post(
+            title="Search", slug="search", author=self.author, content="Body"
+        )
+        with self.assertRaisesMessage(ValidationError, "used by another"):
+            post.full_clean()
+
+    def test_markup_is_not_indexed(self):
+        Post.objects.create(
+            title="Styled", slug="styled", author=self.author,
+            content='<p class="highlight">Body</p>', status=1,
+        )
+        self.assertEqual(self.search("highlight"), [])
+        self.assertEqual(self.search("body"), ["styled"])
+
+    def test_render_command_reindexes(self):
+        Post.objects.filter(pk=self.in_body.pk).update(
+            content="<p>Profiling guide</p>", content_html=""
+        )
+        self.assertEqual(self.search("profiling"), [])
+        call_command("render_posts", stdout=StringIO())
+        self.assertEqual(self.search("profiling"), ["performance-notes"])
+        self.assertEqual(self.search("   "), [])
+
+
+class FeedAndSitemapTests(TestCase):
+    """
+    Tests for the cached feeds and sitemap.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username="author", password="password"
+        )
+        cls.post = Post.objects.create(
+            title="Syndicated", slug="syndicated", author=cls.author,
+            content="<p>Body</p>", status=1,
+        )
+        cls.draft = Post.objects.create(
+            title="Hidden draft", slug="hidden-draft", author=cls.author,
+            content="<p>Body</p>", status=0,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_documents_list_published_posts_only(self):
+        for name in ("rss_feed", "atom_feed", "sitemap"):
+            response = self.client.get(reverse(name))
+            self.assertContains(response, "/syndicated/")
+            self.assertNotContains(response, "hidden-draft")
+
+    def test_cached_until_a_post_is_published(self):
+        url = reverse("sitemap")
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.status = 1
+            self.draft.save()
+        self.assertContains(self.client.get(url), "/hidden-draft/")
+
+    def test_draft_edits_keep_cache(self):
+        url = reverse("rss_feed")
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.draft.title = "Still hidden"
+            self.draft.save()
+        with self.assertNumQueries(0):
+            self.client.get(url)
+
+    def test_conditional_get(self):
+        url = reverse("atom_feed")
+        etag = self.client.get(url)["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class BenchmarkCommandTests(TestCase):
+    """
+    Tests for the ``seed_blog`` and ``benchmark`` commands.
+    """
+
+    def test_seed_and_compare_to_baseline(self):
+        call_command(
+            "seed_blog", users=3, posts=5, comments_per_post=2,
+            stdout=StringIO(),
+        )
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertFalse(User.objects.filter(username="benchmark").exists())
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "baseline.json"
+            call_command(
+                "benchmark", requests=2, warmup=0, save=str(path),
+                async_views=True, stdout=StringIO(),
+            )
+            saved = json.loads(path.read_text())
+            self.assertEqual(
+                set(saved["scenarios"]),
+                {
+                    "home", "post_detail", "post_detail (logged in)",
+                    "comment_edit", "comment_delete", "about",
+                    "home (async)", "post_detail (async)",
+                    "post_detail (logged in) (async)", "about (async)",
+                },
+            )
+            self.assertFalse(
+                User.objects.filter(username="benchmark").exists()
+            )
+
+            saved["scenarios"]["home"]["queries"] -= 1
+            path.write_text(json.dumps(saved))
+            with self.assertRaisesMessage(CommandError, "home: "):
+                call_command(
+                    "benchmark", requests=2, warmup=0, baseline=str(path),
+                    tolerance=100, stdout=StringIO(),
+                )
+
+    def test_refuses_existing_benchmark_user(self):
+        call_command(
+            "seed_blog", users=1, posts=1, comments_per_post=0,
+            stdout=StringIO(),
+        )
+        User.objects.create_user(username="benchmark")
+        with self.assertRaisesMessage(CommandError, "already exists"):
+            call_command("benchmark", requests=1, stdout=StringIO())
+        self.assertTrue(User.objects.filter(username="benchmark").exists())
+
+    def test_small_p50_growth_is_noise(self):
+        scenario = {"p50_ms": 1.0, "peak_kb": 100.0, "queries": 2}
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "baseline.json"
+            path.write_text(json.dumps({"scenarios": {"home": scenario}}))
+            options = {"baseline": str(path), "tolerance": 0.5, "min_ms": 2}
+            command = BenchmarkCommand(stdout=StringIO())
+            command.compare({"home": {**scenario, "p50_ms": 2.5}}, options)
+            with self.assertRaisesMessage(CommandError, "home: p50_ms 3.5"):
+                command.compare(
+                    {"home": {**scenario, "p50_ms": 3.5}}, options
+                )
+
+    def test_refuses_to_seed_twice(self):
+        call_command("seed_blog", users=1, posts=1, stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command("seed_blog", users=1, posts=1, stdout=StringIO())
+
+
+class ExportSiteTests(TestCase):
+    """
+    Tests for the ``export_site`` command.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="author", password="password"
+        )
+        cls.posts = [
+            Post.objects.create(
+                title=f"Post {number}", slug=f"post-{number}",
+                author=cls.user, content="Body", status=1,
+            )
+            for number in range(PostList.paginate_by + 1)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.output = Path(directory.name)
+
+    def export(self):
+        out = StringIO()
+        call_command(
+            "export_site", str(self.output), skip_static=True, stdout=out
+        )
+        return out.getvalue()
+
+    def test_exports_every_page_with_static_page_links(self):
+        self.assertIn("Rendered 13 of 13 pages", self.export())
+        for filename in (
+            "index.html", "page/2/index.html", "post-0/index.html",
+            "about/index.html", "feed/rss/index.xml", "sitemap.xml",
+        ):
+            self.assertTrue((self.output / filename).exists(), filename)
+        home = (self.output / "index.html").read_text()
+        self.assertIn('href="/page/2/"', home)
+        self.assertNotIn("?page=", home)
+        manifest = json.loads((self.output / "manifest.json").read_text())
+        self.assertEqual(
+            manifest["pages"]["/page/2/"]["file"], "page/2/index.html"
+        )
+
+    def test_full_export_removes_deleted_pages(self):
+        self.export()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[1].delete()
+        out = StringIO()
+        call_command(
+            "export_site", str(self.output), full=True, skip_static=True,
+            stdout=out,
+        )
+        self.assertIn("Rendered 11 of 11 pages, removed 2", out.getvalue())
+        self.assertFalse((self.output / "post-1/index.html").exists())
+
+    def test_renders_are_not_reads(self):
+        buffer.take(force=True)
+        self.export()
+        self.assertIsNone(buffer.take(force=True))
+
+    def test_popularity_change_renders_list_pages_again(self):
+        self.export()
+        buffer.record(self.posts[0].slug)
+        flush(force=True)
+        cache.clear()
+        # Both list pages, both feeds and the sitemap.
+        self.assertIn("Rendered 5 of 13 pages", self.export())
+
+    def test_only_changed_pages_are_rendered_again(self):
+        self.export()
+        self.assertIn("Rendered 0 of 13 pages", self.export())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(
+                post=self.posts[0], author=self.user, body="New",
+                approved=True,
+            )
+        self.assertIn("Rendered 1 of 13 pages", self.export())
+        self.assertIn(
+            "New", (self.output / "post-0/index.html").read_text()
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[1].delete()
+        self.assertIn("removed 2", self.export())
+        self.assertFalse((self.output / "post-1").joinpath(
+            "index.html"
+        ).exists())
+        self.assertFalse((self.output / "page/2/index.html").exists())
+
+
+class CommentModerationAdminTests(TestCase):
+    """
+    Tests for the comment moderation admin.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser(
+            username="moderator", password="password"
+        )
+        cls.post = Post.objects.create(
+            title="Moderated", slug="moderated", author=cls.admin_user,
+            content="Body", status=1,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def add_comments(self, count, approved=False):
+        return [
+            Comment.objects.create(
+                post=self.post, author=self.admin_user,
+                body="word " * 50, approved=approved,
+            )
+            for _ in range(count)
+        ]
+
+    def run_action(self, action, comments, model="comment"):
+        return self.client.post(
+            reverse(f"admin:blog_{model}_changelist"),
+            {
+                "action": action,
+                "_selected_action": [comment.pk for comment in comments],
+            },
+        )
+
+    def changelist_queries(self):
+        url = reverse("admin:blog_comment_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        self.add_comments(2)
+        few = self.changelist_queries()
+        self.add_comments(20)
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_approve_and_unapprove_keep_count(self):
+        comments = self.add_comments(3)
+        self.run_action("approve_comments", comments)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 3)
+        self.run_action("unapprove_comments", comments[:1])
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 2)
+
+    def test_delete_is_one_statement(self):
+        approved = self.add_comments(2, approved=True)
+        pending = self.add_comments(2)
+        with CaptureQueriesContext(connection) as queries:
+            self.run_action("delete_comments", approved + pending[:1])
+        deletes = [
+            query for query in queries
+            if query["sql"].startswith('DELETE FROM "blog_comment"')
+        ]
+        self.assertEqual(len(deletes), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.approved_comment_count, 0)
+
+    def test_pending_queue_lists_unapproved_oldest_first(self):
+        first, second = self.add_comments(2)
+        self.add_comments(1, approved=True)
+        response = self.client.get(
+            reverse("admin:blog_pendingcomment_changelist")
+        )
+        self.assertEqual(
+            [comment.pk for comment in response.context["cl"].result_list],
+            [first.pk, second.pk],
+        )
+        self.run_action("approve_comments", [first], model="pendingcomment")
+        self.assertEqual(PendingComment.objects.get().pk, second.pk)
+
+
+@override_settings(RATELIMITS={"comment": (2, 60)})
+class RateLimitTests(TestCase):
+    """
+    Tests for the token buckets on comment POSTs.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="writer", password="password"
+        )
+        cls.other = User.objects.create_user(
+            username="other", password="password"
+        )
+        cls.post = Post.objects.create(
+            title="Limited", slug="limited", author=cls.user,
+            content="Body", status=1,
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.url = reverse("comment_create", args=[self.post.slug])
+
+    def test_burst_then_429_without_saving(self):
+        self.client.force_login(self.user)
+        for _ in range(2):
+            self.client.post(self.url, {"body": "Hi"})
+        with self.assertNumQueries(1):
+            # Only the user lookup, before the bucket; the session is
+            # read from the cache.
+            response = self.client.post(self.url, {"body": "Hi"})
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+        self.assertEqual(Comment.objects.count(), 2)
+
+    def test_buckets_are_per_user_and_scope(self):
+        self.client.force_login(self.user)
+        for _ in range(3):
+            self.client.post(self.url, {"body": "Hi"})
+        self.client.force_login(self.other)
+        response = self.client.post(self.url, {"body": "Hi"})
+        self.assertEqual(response.status_code, 302)
+        # comment_edit has no bucket in this configuration.
+        comment = Comment.objects.filter(author=self.user).first()
+        response = self.client.post(
+            reverse("comment_edit", args=[self.post.slug, comment.pk]),
+            {"body": "Edited"},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    def test_anonymous_clients_keyed_by_ip(self):
+        post_url = reverse("post_detail", args=[self.post.slug])
+        for _ in range(2):
+            self.client.post(post_url, {"body": "Hi"})
+        self.assertEqual(
+            self.client.post(post_url, {"body": "Hi"}).status_code, 429
+        )
+        response = self.client.post(
+            post_url, {"body": "Hi"}, REMOTE_ADDR="10.0.0.2"
+        )
+        self.assertNotEqual(response.status_code, 429)
+
+
+class AsyncViewTests(TestCase):
+    """
+    Tests for the async read views served when ``WEB_MODE`` is "async".
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="reader", password="password"
+        )
+        cls.post = Post.objects.create(
+            title="Async", slug="async", author=cls.user,
+            content="<p>Async body</p>", status=1,
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, body="Approved", approved=True
+        )
+
+    def setUp(self):
+        cache.clear()
+        views = async_views()
+        views.__enter__()
+        self.addCleanup(views.__exit__, None, None, None)
+
+    async def test_list_and_detail(self):
+        response = await self.async_client.get(reverse("home"))
+        self.assertContains(response, "Async")
+        url = reverse("post_detail", args=[self.post.slug])
+        response = await self.async_client.get(url)
+        self.assertContains(response, "Async body")
+        self.assertContains(response, "Approved")
+        self.assertIn("Cookie", response["Vary"])
+
+    async def test_logged_in_detail(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        url = reverse("post_detail", args=[self.post.slug])
+        response = await self.async_client.get(url)
+        self.assertContains(response, "Async body")
+        self.assertFalse(response.has_header("Last-Modified"))
+
+    async def test_revalidates(self):
+        url = reverse("post_detail", args=[self.post.slug])
+        response = await self.async_client.get(url)
+        response = await self.async_client.get(
+            url, headers={"If-None-Match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_missing_post_is_404(self):
+        response = await self.async_client.get(
+            reverse("post_detail", args=["missing"])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_comment_post_uses_sync_view(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("post_detail", args=[self.post.slug]), {"body": "Hi"}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Comment.objects.filter(body="Hi").exists())
+
+
+class PopularityTests(TestCase):
+    """
+    Tests for the buffered read counts and the popular posts sidebar.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            username="editor", password="password"
+        )
+        cls.hot = Post.objects.create(
+            title="Hot", slug="hot", author=cls.user,
+            content="Body", status=1,
+        )
+        cls.cold = Post.objects.create(
+            title="Cold", slug="cold", author=cls.user,
+            content="Body", status=1,
+        )
+
+    def setUp(self):
+        cache.clear()
+        # Drop reads counted by other tests.
+        buffer.take(force=True)
+
+    def read(self, post, times=1):
+        for _ in range(times):
+            response = self.client.get(
+                reverse("post_detail", args=[post.slug])
+            )
+            self.assertEqual(response.status_code, 200)
+
+    def test_reads_are_buffered_then_written_in_one_batch(self):
+        self.read(self.hot)
+        with self.assertNumQueries(0):
+            # Served from the page cache, and still counted.
+            self.read(self.hot)
+        self.read(self.cold)
+        self.assertFalse(PostStats.objects.exists())
+
+        self.assertEqual(flush(force=True), 2)
+        self.assertEqual(PostStats.objects.get(post=self.hot).views, 2)
+        self.assertEqual(flush(force=True), 0)
+        self.read(self.hot)
+        flush(force=True)
+        self.assertEqual(PostStats.objects.get(post=self.hot).views, 3)
+
+    def test_score_halves_each_half_life(self):
+        start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        later = start + timedelta(hours=settings.POPULAR_HALF_LIFE)
+        log_score = add_views(None, 4, start)
+        self.assertAlmostEqual(current_score(log_score, start), 4)
+        self.assertAlmostEqual(current_score(log_score, later), 2)
+        log_score = add_views(log_score, 2, later)
+        self.assertAlmostEqual(current_score(log_score, later), 4)
+
+    def test_sidebar_and_admin_column(self):
+        self.read(self.cold)
+        self.read(self.hot, times=3)
+        flush(force=True)
+        response = self.client.get(reverse("home"))
+        self.assertEqual(
+            [post["slug"] for post in response.context["popular_posts"]],
+            ["hot", "cold"],
+        )
+        self.assertContains(response, "Popular posts")
+
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("admin:blog_post_changelist"))
+        self.assertContains(response, "column-popularity")
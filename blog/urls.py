@@ -1,10 +1,40 @@
+from django.conf import settings
+from django.contrib.sitemaps.views import sitemap
 from django.urls import path
+from django.views.decorators.http import condition
 from . import views
+from .cache import cached_document
+from .conditional import document_etag, document_last_modified
+from .feeds import AtomLatestPostsFeed, LatestPostsFeed
+from .sitemaps import sitemaps
 
 
+def document(view):
+    """Cache a feed or sitemap view and answer conditional GETs for it."""
+    return condition(document_etag, document_last_modified)(
+        cached_document(view)
+    )
+
+
+# With WEB_MODE=async the read views are served natively by ASGI.
+if settings.ASYNC_VIEWS:
+    post_list, post_detail = views.post_list_async, views.post_detail_async
+else:
+    post_list, post_detail = views.PostList.as_view(), views.post_detail
+
 urlpatterns = [
-    path('', views.PostList.as_view(), name='home'),
-    path('<slug:slug>/', views.post_detail, name='post_detail'),
+    path('', post_list, name='home'),
+    # Before the post slug pattern, which would otherwise match it.
+    path('search/', views.PostSearch.as_view(), name='search'),
+    path('feed/rss/', document(LatestPostsFeed()), name='rss_feed'),
+    path('feed/atom/', document(AtomLatestPostsFeed()), name='atom_feed'),
+    path('sitemap.xml', document(sitemap), {'sitemaps': sitemaps},
+         name='sitemap'),
+    path('<slug:slug>/', post_detail, name='post_detail'),
+    path('<slug:slug>/comments/', views.comment_list,
+         name='comment_list'),
+    path('<slug:slug>/add_comment/', views.comment_create,
+         name='comment_create'),
     path('<slug:slug>/edit_comment/<int:comment_id>',
          views.comment_edit, name='comment_edit'),
     path('<slug:slug>/delete_comment/<int:comment_id>',
@@ -1,18 +1,93 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.views import redirect_to_login
 from django.shortcuts import render, get_object_or_404, reverse
+from django.template.loader import render_to_string
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition, require_POST
 from django.contrib import messages
-from django.http import HttpResponseRedirect
+from django.http import HttpResponseRedirect, Http404, JsonResponse
+from codestar.ratelimit import ratelimit
+from codestar.routers import primary
 from .models import Post, Comment
 from .forms import CommentForm
+from .cache import (
+    page_cache_allowed, get_cached_page, set_cached_page,
+    aget_cached_page, aset_cached_page,
+)
+from .conditional import (
+    post_detail_etag, post_detail_last_modified,
+    post_list_etag, post_list_last_modified,
+    acondition, load_request_state,
+    apost_detail_etag, apost_detail_last_modified,
+    apost_list_etag, apost_list_last_modified,
+)
+from .pagination import CursorPaginator, InvalidCursor
+from .popularity import apopular_posts, counts_views, popular_posts
+from .search import search_posts
 
 
 # Create your views here.
+@method_decorator(
+    condition(post_list_etag, post_list_last_modified), name="dispatch"
+)
 class PostList(generic.ListView):
-    queryset = Post.objects.filter(status=1)
+    queryset = Post.objects.for_list()
+    # Same order as the cursor pages, with id breaking timestamp ties.
+    ordering = ["-created_on", "-id"]
     template_name = "blog/index.html"
     paginate_by = 6
 
+    def paginate_queryset(self, queryset, page_size):
+        """
+        Paginate by cursor unless a ``?page=`` number is requested.
 
+        Cursor pages avoid the ``COUNT(*)`` and ``OFFSET`` of numbered
+        pages; ``?page=`` links are still served for existing bookmarks.
+        """
+        if self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = CursorPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404("Invalid cursor")
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["popular_posts"] = popular_posts()
+        return context
+
+
+class PostSearch(generic.ListView):
+    """
+    Published posts matching ``?q=``, best matches first.
+
+    **Template:**
+
+    :template:`blog/search.html`
+    """
+    template_name = "blog/search.html"
+    paginate_by = 10
+
+    def get_queryset(self):
+        self.query = self.request.GET.get("q", "").strip()
+        if not self.query:
+            return Post.objects.none()
+        return search_posts(self.query, Post.objects.for_list())
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.query
+        return context
+
+
+@counts_views
+@ratelimit("comment")
+@condition(post_detail_etag, post_detail_last_modified)
 def post_detail(request, slug):
     """
     Display an individual :model:`blog.Post`.
@@ -25,46 +100,168 @@ def post_detail(request, slug):
     **Template:**
 
     :template:`blog/post_detail.html`
+
+    Anonymous GETs are answered from the full-page cache when possible,
+    see :mod:`blog.cache`.
     """
+    if page_cache_allowed(request):
+        response = get_cached_page(slug)
+        if response is None:
+            # Filled from the primary; a page rendered from a lagging
+            # replica would be served until the next invalidation.
+            with primary():
+                response = _post_detail(request, slug)
+            set_cached_page(request, slug, response)
+        return response
+    return _post_detail(request, slug)
+
 
-    queryset = Post.objects.filter(status=1)
+def _post_detail(request, slug):
+    # Only the sanitized content_html is shown.
+    queryset = Post.objects.published().with_author().defer("content")
     post = get_object_or_404(queryset, slug=slug)
-    comments = post.comments.all().order_by("-created_on")
-    comment_count = post.comments.filter(approved=True).count()
 
     if request.method == "POST":
         comment_form = CommentForm(data=request.POST)
-        if comment_form.is_valid():
-            comment = comment_form.save(commit=False)
-            comment.author = request.user
-            comment.post = post
-            comment.save()
+        if request.user.is_authenticated and comment_form.is_valid():
+            _save_comment(comment_form, post, request.user)
             messages.add_message(
                 request, messages.SUCCESS,
                 'Comment submitted and awaiting approval'
             )
+            # Redirect so a refresh does not submit the comment again.
+            return HttpResponseRedirect(reverse('post_detail', args=[slug]))
+    else:
+        comment_form = CommentForm()
 
-    comment_form = CommentForm()
+    try:
+        comments = _comment_page(request, post, request.GET.get("comments"))
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
 
     return render(
         request,
         "blog/post_detail.html",
-        {
-            "post": post,
-            "comments": comments,
-            "comment_count": comment_count,
-            "comment_form": comment_form,
-        },
+        _post_detail_context(post, comments, comment_form),
     )
 
 
+def _post_detail_context(post, comments, comment_form):
+    return {
+        "post": post,
+        "comments": comments,
+        "comment_count": post.approved_comment_count,
+        "comment_form": comment_form,
+        "cache_timeout": settings.BLOG_CACHE_TIMEOUT,
+    }
+
+
+def _comment_paginator(request, post):
+    queryset = post.comments.visible_to(request.user).select_related("author")
+    return CursorPaginator(queryset, settings.BLOG_COMMENTS_PER_PAGE)
+
+
+def _comment_page(request, post, cursor=None):
+    """
+    One chunk of the comments ``request.user`` may see on ``post``.
+    """
+    return _comment_paginator(request, post).page(cursor)
+
+
+def comment_list(request, slug):
+    """
+    Return the next chunk of comments on a :model:`blog.Post` as JSON.
+
+    Requested by ``static/js/comments.js`` when the reader asks for more
+    comments; ``html`` holds the rendered comments and ``next_url`` the
+    URL of the following chunk, if any.
+
+    **Template:**
+
+    :template:`blog/includes/comment.html`
+    """
+    post = get_object_or_404(Post.objects.published().only("slug"), slug=slug)
+    try:
+        comments = _comment_page(request, post, request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+
+    html = "".join(
+        render_to_string(
+            "blog/includes/comment.html", {"comment": comment}, request
+        )
+        for comment in comments
+    )
+    next_url = None
+    if comments.has_next():
+        next_url = (
+            f"{reverse('comment_list', args=[slug])}"
+            f"?cursor={comments.next_cursor}"
+        )
+    return JsonResponse({"html": html, "next_url": next_url})
+
+
+def _save_comment(comment_form, post, author):
+    comment = comment_form.save(commit=False)
+    comment.author = author
+    comment.post = post
+    comment.save()
+    return comment
+
+
+@require_POST
+@ratelimit("comment")
+def comment_create(request, slug):
+    """
+    Create a :model:`blog.Comment` without re-rendering the post.
+
+    ``static/js/comments.js`` posts here with ``X-Requested-With`` and
+    gets back JSON holding the rendered comment to insert. Other requests
+    are redirected back to :view:`blog.views.post_detail`.
+
+    **Template:**
+
+    :template:`blog/includes/comment.html`
+    """
+    is_ajax = request.headers.get("x-requested-with") == "XMLHttpRequest"
+    post_url = reverse('post_detail', args=[slug])
+
+    if not request.user.is_authenticated:
+        if is_ajax:
+            return JsonResponse(
+                {"error": "Log in to leave a comment"}, status=403
+            )
+        return redirect_to_login(post_url)
+
+    post = get_object_or_404(Post.objects.published().only("slug"), slug=slug)
+    comment_form = CommentForm(data=request.POST)
+
+    if not comment_form.is_valid():
+        if is_ajax:
+            return JsonResponse({"errors": comment_form.errors}, status=400)
+        messages.add_message(request, messages.ERROR, 'Error adding comment!')
+        return HttpResponseRedirect(post_url)
+
+    comment = _save_comment(comment_form, post, request.user)
+    message = 'Comment submitted and awaiting approval'
+    if is_ajax:
+        html = render_to_string(
+            "blog/includes/comment.html", {"comment": comment}, request
+        )
+        return JsonResponse({"html": html, "message": message}, status=201)
+
+    messages.add_message(request, messages.SUCCESS, message)
+    return HttpResponseRedirect(post_url)
+
+
+@ratelimit("comment_edit")
 def comment_edit(request, slug, comment_id):
     """
     view to edit comments
     """
     if request.method == "POST":
 
-        queryset = Post.objects.filter(status=1)
+        queryset = Post.objects.published()
         post = get_object_or_404(queryset, slug=slug)
         comment = get_object_or_404(Comment, pk=comment_id)
         comment_form = CommentForm(data=request.POST, instance=comment)
@@ -81,11 +278,15 @@ def comment_edit(request, slug, comment_id):
     return HttpResponseRedirect(reverse('post_detail', args=[slug]))
 
 
+@require_POST
 def comment_delete(request, slug, comment_id):
     """
     view to delete comment
+
+    POST only, so the write pins the reader to the primary database
+    and the redirected page no longer shows the comment.
     """
-    queryset = Post.objects.filter(status=1)
+    queryset = Post.objects.published()
     post = get_object_or_404(queryset, slug=slug)
     comment = get_object_or_404(Comment, pk=comment_id)
 
@@ -96,3 +297,104 @@ def comment_delete(request, slug, comment_id):
         messages.add_message(request, messages.ERROR, 'You can only delete your own comments!')
 
     return HttpResponseRedirect(reverse('post_detail', args=[slug]))
+
+
+# Async read views, routed instead of PostList and post_detail when
+# WEB_MODE is "async" (see gunicorn.conf.py). GETs read the
+# database through the async ORM, so a slow query no longer holds a
+# worker; anything else is handed to the sync view in a thread.
+
+_post_list_view = PostList.as_view()
+
+
+async def post_list_async(request):
+    """
+    Async version of :view:`blog.views.PostList` for cursor pages.
+
+    Numbered ``?page=`` requests are served by the sync view.
+
+    **Template:**
+
+    :template:`blog/index.html`
+    """
+    if request.method not in ("GET", "HEAD") or \
+            PostList.page_kwarg in request.GET:
+        return await sync_to_async(_post_list_view)(request)
+    await sync_to_async(load_request_state)(request)
+    return await _post_list_read(request)
+
+
+@acondition(apost_list_etag, apost_list_last_modified)
+async def _post_list_read(request):
+    paginator = CursorPaginator(Post.objects.for_list(), PostList.paginate_by)
+    try:
+        page = await paginator.apage(request.GET.get("cursor"))
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+    return render(
+        request,
+        "blog/index.html",
+        {
+            "paginator": paginator,
+            "page_obj": page,
+            "is_paginated": page.has_other_pages(),
+            "object_list": page.object_list,
+            "post_list": page.object_list,
+            "popular_posts": await apopular_posts(),
+        },
+    )
+
+
+@counts_views
+async def post_detail_async(request, slug):
+    """
+    Async version of :view:`blog.views.post_detail`.
+
+    Comment POSTs are served by the sync view.
+
+    **Context**
+
+    ``post``
+        An instance of :model:`blog.Post`.
+
+    **Template:**
+
+    :template:`blog/post_detail.html`
+    """
+    if request.method not in ("GET", "HEAD"):
+        return await sync_to_async(post_detail)(request, slug)
+    await sync_to_async(load_request_state)(request)
+    return await _post_detail_read(request, slug)
+
+
+@acondition(apost_detail_etag, apost_detail_last_modified)
+async def _post_detail_read(request, slug):
+    if page_cache_allowed(request):
+        response = await aget_cached_page(slug)
+        if response is None:
+            with primary():
+                response = await _apost_detail(request, slug)
+            await aset_cached_page(request, slug, response)
+        return response
+    return await _apost_detail(request, slug)
+
+
+async def _apost_detail(request, slug):
+    queryset = Post.objects.published().with_author().defer("content")
+    try:
+        post = await queryset.aget(slug=slug)
+    except Post.DoesNotExist:
+        raise Http404("No Post matches the given query.")
+
+    try:
+        comments = await _comment_paginator(request, post).apage(
+            request.GET.get("comments")
+        )
+    except InvalidCursor:
+        raise Http404("Invalid cursor")
+
+    return render(
+        request,
+        "blog/post_detail.html",
+        _post_detail_context(post, comments, CommentForm()),
+    )
@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+
+    list_display = ('name', 'status', 'attempts', 'run_after', 'updated_on')
+    list_filter = ('status', 'name')
+    readonly_fields = (
+        'name', 'kwargs', 'attempts', 'last_error', 'created_on',
+        'updated_on',
+    )
+    show_full_result_count = False
@@ -0,0 +1,27 @@
+from allauth.account.apps import AccountConfig as BaseAccountConfig
+from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
+class CodestarConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'codestar'
+
+    def ready(self):
+        from . import checks, dbstats  # noqa: F401
+
+
+class AccountConfig(BaseAccountConfig):
+    """
+    allauth's account app, requiring the async-capable
+    ``codestar.middleware.AccountMiddleware`` in place of allauth's own.
+    """
+    default = False
+
+    def ready(self):
+        required_mw = "codestar.middleware.AccountMiddleware"
+        if required_mw not in settings.MIDDLEWARE:
+            raise ImproperlyConfigured(
+                f"{required_mw} must be added to settings.MIDDLEWARE"
+            )
@@ -0,0 +1,14 @@
+from django.db.backends.postgresql import base
+
+from codestar.dbstats import stats
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    The stock PostgreSQL backend, timing how long new connections take to
+    open (including TLS setup) for :mod:`codestar.dbstats`.
+    """
+
+    def get_new_connection(self, conn_params):
+        with stats.time_connect():
+            return super().get_new_connection(conn_params)
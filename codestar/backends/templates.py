@@ -0,0 +1,30 @@
+from django.template import TemplateDoesNotExist
+from django.template.backends import django
+
+from codestar.perf import time_template
+
+
+class Template(django.Template):
+    """
+    A Django template whose render time is added to the current request
+    by :mod:`codestar.perf`.
+    """
+
+    def render(self, context=None, request=None):
+        with time_template():
+            return super().render(context, request)
+
+
+class DjangoTemplates(django.DjangoTemplates):
+    """
+    The stock Django template backend, returning timed templates.
+    """
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django.reraise(exc, self)
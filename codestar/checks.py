@@ -0,0 +1,60 @@
+"""
+System checks for the project's templates.
+"""
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.checks import Error, Tags, register
+
+# Literal paths given to {% static %} and to the default image argument
+# of {% responsive_image %}, which is passed on to {% static %}.
+STATIC_REFERENCE = re.compile(
+    r"""\{%\s*(?:static|responsive_image\s+\S+\s+\S+)\s+"""
+    r"""(['"])(?P<path>[^'"]+)\1"""
+)
+
+
+def project_template_dirs():
+    """
+    The ``DIRS`` of each template engine plus the ``templates`` folder of
+    every app in this repository. Installed packages are left out.
+    """
+    base = Path(settings.BASE_DIR)
+    for engine in settings.TEMPLATES:
+        yield from (Path(directory) for directory in engine.get("DIRS", ()))
+    for app_config in apps.get_app_configs():
+        path = Path(app_config.path)
+        if path.parent == base:
+            yield path / "templates"
+
+
+def static_references():
+    """
+    Yield ``(template, path)`` for every literal static path in the
+    project's templates.
+    """
+    for directory in project_template_dirs():
+        for template in sorted(directory.rglob("*.html")):
+            text = template.read_text(encoding="utf-8")
+            for match in STATIC_REFERENCE.finditer(text):
+                yield template, match["path"]
+
+
+@register(Tags.staticfiles, Tags.templates)
+def check_static_references(app_configs, **kwargs):
+    """
+    Every ``{% static %}`` path must exist, or the manifest storage
+    fails the page at render time.
+    """
+    return [
+        Error(
+            f"Static file {path!r} referenced in {template} does not exist.",
+            hint="Fix the path or add the file under static/.",
+            id="codestar.E001",
+        )
+        for template, path in static_references()
+        if finders.find(path) is None
+    ]
@@ -0,0 +1,129 @@
+"""
+Per-worker database connection statistics.
+
+Each process counts how many requests opened a new connection and how
+many reused a persistent one, and how long opening took (recorded by
+:mod:`codestar.backends.postgresql`). Snapshots are published to the
+default cache every ``DB_STATS_PUBLISH_INTERVAL`` seconds so the
+``dbstats`` management command can show every worker. With the
+local-memory cache only the current process is visible; set
+``CACHE_DIR`` to share the snapshots.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+WORKERS_KEY = "dbstats:workers"
+WORKER_KEY = "dbstats:worker:{pid}"
+
+
+class ConnectionStats:
+    """
+    Thread-safe counters for one worker process.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.opens = 0
+        self.reuses = 0
+        self.connect_seconds = 0.0
+        self.max_connect_seconds = 0.0
+        self.started = time.time()
+        self.published = 0.0
+
+    def record_request(self, reused):
+        with self.lock:
+            self.requests += 1
+            self.reuses += reused
+
+    def record_open(self):
+        with self.lock:
+            self.opens += 1
+
+    @contextmanager
+    def time_connect(self):
+        """Time the opening of a new connection."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.connect_seconds += elapsed
+                self.max_connect_seconds = max(
+                    self.max_connect_seconds, elapsed
+                )
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "pid": os.getpid(),
+                "started": self.started,
+                "updated": time.time(),
+                "requests": self.requests,
+                "opens": self.opens,
+                "reuses": self.reuses,
+                "connect_seconds": self.connect_seconds,
+                "max_connect_seconds": self.max_connect_seconds,
+            }
+
+    def publish(self, force=False):
+        """
+        Store a snapshot in the cache, at most once per publish interval.
+        """
+        now = time.time()
+        interval = settings.DB_STATS_PUBLISH_INTERVAL
+        if not force and now - self.published < interval:
+            return
+        self.published = now
+        snapshot = self.snapshot()
+        timeout = interval * 10
+        cache.set(WORKER_KEY.format(pid=snapshot["pid"]), snapshot, timeout)
+        workers = set(cache.get(WORKERS_KEY, ()))
+        if snapshot["pid"] not in workers:
+            workers.add(snapshot["pid"])
+            cache.set(WORKERS_KEY, sorted(workers), None)
+
+
+def published_snapshots():
+    """Every worker snapshot still present in the cache."""
+    pids = cache.get(WORKERS_KEY, ())
+    found = cache.get_many([WORKER_KEY.format(pid=pid) for pid in pids])
+    return sorted(found.values(), key=lambda snapshot: snapshot["pid"])
+
+
+stats = ConnectionStats()
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    stats.record_open()
+
+
+@receiver(request_started)
+def request_began(sender, **kwargs):
+    """
+    Count requests starting with a live persistent connection.
+
+    Runs after Django's own ``close_old_connections`` handler, so any
+    connection past ``CONN_MAX_AGE`` has already been closed.
+    """
+    reused = any(
+        conn.connection is not None
+        for conn in connections.all(initialized_only=True)
+    )
+    stats.record_request(reused)
+
+
+@receiver(request_finished)
+def request_ended(sender, **kwargs):
+    stats.publish()
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from codestar.dbstats import published_snapshots
+
+
+class Command(BaseCommand):
+    """
+    Show the connection statistics published by each worker process.
+    """
+
+    help = "Show per-worker database connection opens, reuses and wait time."
+
+    def handle(self, *args, **options):
+        snapshots = published_snapshots()
+        if not snapshots:
+            self.stdout.write(
+                "No worker statistics found. Workers publish to the default "
+                "cache, so it must be shared (set CACHE_DIR) to be read here."
+            )
+            return
+
+        self.stdout.write(
+            f"{'pid':>8} {'requests':>9} {'opens':>7} {'reuses':>7} "
+            f"{'reuse %':>8} {'avg open ms':>12} {'max open ms':>12} "
+            f"{'age s':>7}"
+        )
+        now = time.time()
+        for snap in snapshots:
+            reuse_rate = 100 * snap["reuses"] / snap["requests"] \
+                if snap["requests"] else 0
+            avg_ms = 1000 * snap["connect_seconds"] / snap["opens"] \
+                if snap["opens"] else 0
+            self.stdout.write(
+                f"{snap['pid']:>8} {snap['requests']:>9} {snap['opens']:>7} "
+                f"{snap['reuses']:>7} {reuse_rate:>8.1f} {avg_ms:>12.2f} "
+                f"{1000 * snap['max_connect_seconds']:>12.2f} "
+                f"{now - snap['updated']:>7.0f}"
+            )
@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from codestar.tasks import claim, run
+
+
+class Command(BaseCommand):
+    """
+    Run queued :model:`codestar.Task` entries.
+
+    Polls the task table every ``--interval`` seconds while idle. With
+    ``--once`` it drains the due tasks and exits, for cron jobs and
+    tests.
+    """
+
+    help = "Run background tasks from the database queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Seconds to wait between polls of an empty queue.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=20,
+            help="Number of tasks to claim per poll.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Run the tasks that are due now, then exit.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                tasks = claim(options["batch_size"])
+                for task_row in tasks:
+                    ok = run(task_row)
+                    self.stdout.write(
+                        f"{task_row.name} #{task_row.pk}: "
+                        f"{'done' if ok else 'failed'}"
+                    )
+                if not tasks:
+                    if options["once"]:
+                        return
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
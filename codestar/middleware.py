@@ -0,0 +1,135 @@
+from allauth.account import middleware
+from allauth.core import context
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from whitenoise import middleware as whitenoise
+
+from .routers import PIN_COOKIE
+
+# Cookies that make a response specific to one visitor.
+VISITOR_COOKIES = (
+    settings.SESSION_COOKIE_NAME,
+    settings.CSRF_COOKIE_NAME,
+    CookieStorage.cookie_name,
+    PIN_COOKIE,
+)
+
+
+class WhiteNoiseMiddleware(whitenoise.WhiteNoiseMiddleware):
+    """
+    WhiteNoise's middleware with an async path. WhiteNoise 5 is sync only,
+    which under ASGI would run the whole middleware chain below it in a
+    thread.
+
+    Finding a static file is a dictionary lookup, so it is done inline.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = await self.get_response(request)
+        return response
+
+
+class AccountMiddleware(middleware.AccountMiddleware):
+    """
+    allauth's middleware with an async path, so async views under ASGI
+    are not pushed back onto a thread by a sync-only middleware.
+
+    It also leaves the session alone for visitors without one, where
+    allauth would load it on every response to look for a dangling
+    login.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        with context.request_context(request):
+            response = await self.get_response(request)
+            if self.has_session(request):
+                # Reads the session, which may query the database.
+                await sync_to_async(self._remove_dangling_login)(
+                    request, response
+                )
+            return response
+
+    def has_session(self, request):
+        return (
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+            or request.session.accessed
+        )
+
+    def _remove_dangling_login(self, request, response):
+        if self.has_session(request):
+            super()._remove_dangling_login(request, response)
+
+
+class PublicCacheMiddleware:
+    """
+    Let shared caches keep the pages served to anonymous visitors.
+
+    A successful GET from a visitor sending none of
+    :data:`VISITOR_COOKIES` is marked public for ``PUBLIC_CACHE_SECONDS``,
+    with ``Vary: Cookie`` so logged-in readers never receive it. Responses
+    that set a cookie or already have ``Cache-Control`` are left alone,
+    and responses to visitors with a session, or to form posts, are
+    marked private.
+
+    Sits above ``SessionMiddleware`` to see the final cookies and Vary.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process(request, await self.get_response(request))
+
+    def process(self, request, response):
+        if response.has_header("Cache-Control"):
+            return response
+        if request.method not in ("GET", "HEAD"):
+            patch_cache_control(response, private=True)
+        elif any(name in request.COOKIES for name in VISITOR_COOKIES):
+            patch_cache_control(response, private=True)
+        elif response.status_code in (200, 304) and not response.cookies:
+            patch_cache_control(
+                response, public=True, max_age=settings.PUBLIC_CACHE_SECONDS
+            )
+            patch_vary_headers(response, ("Cookie",))
+        return response
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.24 on 2026-10-18 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('codestar', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('status', 1)), fields=['updated_on'], name='task_running_idx'),
+        ),
+    ]
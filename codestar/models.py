@@ -0,0 +1,57 @@
+from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+PENDING, RUNNING, DONE, FAILED = range(4)
+TASK_STATUS = (
+    (PENDING, "Pending"),
+    (RUNNING, "Running"),
+    (DONE, "Done"),
+    (FAILED, "Failed"),
+)
+
+
+class Task(models.Model):
+    """
+    A call to a :func:`codestar.tasks.task` function, queued for the
+    ``run_tasks`` worker.
+
+    Fields:
+        name (CharField): Dotted import path of the task function.
+        kwargs (JSONField): Keyword arguments to call it with.
+        status (IntegerField): Pending, Running, Done or Failed.
+        attempts (PositiveSmallIntegerField): Runs started so far.
+        run_after (DateTimeField): Earliest time the next run may start.
+        last_error (TextField): Traceback of the latest failure.
+        created_on (DateTimeField): Timestamp when the task was queued.
+        updated_on (DateTimeField): Timestamp of the last change; for a
+            running task, when it was claimed.
+    """
+    name = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict)
+    status = models.IntegerField(choices=TASK_STATUS, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_on = models.DateTimeField(auto_now_add=True)
+    updated_on = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["run_after", "id"]
+        indexes = [
+            # The worker's poll: pending tasks whose time has come.
+            models.Index(
+                fields=["run_after", "id"],
+                condition=Q(status=PENDING),
+                name="task_pending_idx",
+            ),
+            # Running tasks, to find those whose worker died.
+            models.Index(
+                fields=["updated_on"],
+                condition=Q(status=RUNNING),
+                name="task_running_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
@@ -0,0 +1,256 @@
+"""
+Request-level performance instrumentation.
+
+:class:`PerformanceMiddleware` records, for every request, the wall time,
+the number and total time of SQL queries, the template render time
+(recorded by :mod:`codestar.backends.templates`) and the response size.
+They are logged to the ``codestar.perf`` logger as one ``key=value``
+line per request, and sent back in a ``Server-Timing`` header to staff,
+or to everyone when ``PERF_SERVER_TIMING`` is on. Responses marked
+public never carry the header, so shared caches cannot keep one
+request's timings.
+
+A ``PERF_SAMPLE_RATE`` share of requests is also kept in a per-process
+:class:`Aggregate`, keyed on URL name, which the staff-only
+``/admin/performance/`` page reports as p50/p95 figures. Like
+:mod:`codestar.dbstats`, each worker only sees its own samples.
+"""
+import logging
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.cache import cc_delim_re
+
+logger = logging.getLogger("codestar.perf")
+
+current = ContextVar("codestar_perf_timings", default=None)
+
+
+class RequestTimings:
+    """
+    Counters for one request, made :data:`current` by the middleware.
+    """
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_seconds += time.perf_counter() - start
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding the query to the current request's
+    timings, if there is one.
+
+    It is installed on each connection as it opens rather than by the
+    middleware, because under ASGI the queries of an async view run on
+    ``sync_to_async`` threads with connections of their own. The
+    :data:`current` timings follow the request's context onto them.
+    """
+    timings = current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def install_query_timer(connection):
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+@receiver(connection_created)
+def connection_opened(sender, connection, **kwargs):
+    install_query_timer(connection)
+
+
+# Connections opened before this module was imported.
+for opened in connections.all(initialized_only=True):
+    install_query_timer(opened)
+
+
+@contextmanager
+def time_template():
+    """
+    Add the time spent in the block to the current request's template
+    time. Nested renders are only counted once, by the outermost block.
+    """
+    timings = current.get()
+    if timings is None:
+        yield
+        return
+    timings.template_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.template_depth -= 1
+        if not timings.template_depth:
+            timings.template_seconds += time.perf_counter() - start
+
+
+def percentile(values, fraction):
+    """The nearest-rank percentile of a non-empty list of numbers."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Aggregate:
+    """
+    The latest ``PERF_SAMPLE_SIZE`` samples of each URL name.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(
+            lambda: deque(maxlen=settings.PERF_SAMPLE_SIZE)
+        )
+
+    def add(self, name, sample):
+        with self.lock:
+            self.samples[name].append(sample)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        """One row of p50/p95 figures per URL name, slowest p95 first."""
+        with self.lock:
+            samples = {name: list(rows) for name, rows in self.samples.items()}
+        summary = []
+        for name, rows in samples.items():
+            total = [row["total_ms"] for row in rows]
+            sql = [row["sql_ms"] for row in rows]
+            template = [row["template_ms"] for row in rows]
+            queries = [row["sql_queries"] for row in rows]
+            summary.append({
+                "name": name,
+                "count": len(rows),
+                "total_p50": percentile(total, 0.5),
+                "total_p95": percentile(total, 0.95),
+                "sql_p50": percentile(sql, 0.5),
+                "sql_p95": percentile(sql, 0.95),
+                "template_p50": percentile(template, 0.5),
+                "template_p95": percentile(template, 0.95),
+                "queries_p50": percentile(queries, 0.5),
+                "queries_max": max(queries),
+            })
+        return sorted(summary, key=lambda row: row["total_p95"], reverse=True)
+
+
+aggregate = Aggregate()
+
+
+def server_timing(record):
+    return (
+        f'app;dur={record["total_ms"]:.1f}, '
+        f'db;dur={record["sql_ms"]:.1f};desc="{record["sql_queries"]} queries", '
+        f'tpl;dur={record["template_ms"]:.1f}'
+    )
+
+
+class PerformanceMiddleware:
+    """
+    Time each request and report it in ``Server-Timing``, the log and the
+    sampled :data:`aggregate`.
+
+    Placed after WhiteNoise, so static files are not measured. Works in
+    both sync and async stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current.reset(token)
+        show = self.show_timing(request, response)
+        return self.report(request, response, timings, start, show)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current.reset(token)
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            # Loading the user may query the database.
+            show = await sync_to_async(self.show_timing)(request, response)
+        else:
+            show = self.show_timing(request, response)
+        return self.report(request, response, timings, start, show)
+
+    def show_timing(self, request, response):
+        """Whether ``response`` may carry the Server-Timing header."""
+        cache_control = cc_delim_re.split(response.get("Cache-Control", ""))
+        if "public" in cache_control:
+            return False
+        if settings.PERF_SERVER_TIMING:
+            return True
+        # Only visitors with a session can be staff.
+        return (
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+            and getattr(request, "user", None) is not None
+            and request.user.is_staff
+        )
+
+    def report(self, request, response, timings, start, show):
+        total = time.perf_counter() - start
+        match = request.resolver_match
+        record = {
+            "view": match.view_name if match else "unresolved",
+            "method": request.method,
+            "status": response.status_code,
+            "total_ms": 1000 * total,
+            "sql_queries": timings.sql_count,
+            "sql_ms": 1000 * timings.sql_seconds,
+            "template_ms": 1000 * timings.template_seconds,
+            "bytes": None if response.streaming else len(response.content),
+        }
+        if show:
+            response["Server-Timing"] = server_timing(record)
+        logger.info(
+            "view=%(view)s method=%(method)s status=%(status)s "
+            "total_ms=%(total_ms).1f sql_queries=%(sql_queries)d "
+            "sql_ms=%(sql_ms).1f template_ms=%(template_ms).1f "
+            "bytes=%(bytes)s",
+            record,
+            extra={"perf": record},
+        )
+        if random.random() < settings.PERF_SAMPLE_RATE:
+            aggregate.add(record["view"], record)
+        return response
@@ -0,0 +1,92 @@
+"""
+Token-bucket rate limiting for write endpoints.
+
+Each scope in ``settings.RATELIMITS`` maps to ``(capacity, period)``: a
+client may make ``capacity`` requests in a burst, and tokens refill at
+``capacity`` per ``period`` seconds. Buckets are kept per scope and per
+client (the user when logged in, otherwise the IP address) in the
+default cache. The read-modify-write is not atomic, so concurrent
+requests can occasionally slip one extra request through; that is an
+accepted trade for not needing a shared lock.
+
+Limited requests get a bare 429 with ``Retry-After`` before the view
+validates a form or renders a template.
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse
+
+BUCKET_KEY = "ratelimit:{scope}:{client}"
+
+
+def client_ip(request):
+    """
+    The client's address. With ``RATELIMIT_TRUSTED_PROXIES`` set to the
+    number of proxies in front of the app, it is read from that many
+    entries from the right of ``X-Forwarded-For``, which those proxies
+    append to and clients cannot forge.
+    """
+    proxies = settings.RATELIMIT_TRUSTED_PROXIES
+    if proxies:
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "").split(",")
+        if len(forwarded) >= proxies:
+            return forwarded[-proxies].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def client_key(request):
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    return f"ip:{client_ip(request)}"
+
+
+def take_token(scope, client):
+    """
+    Take a token from the client's bucket for ``scope``. Returns 0 if
+    the request may go ahead, otherwise the seconds until it could.
+    """
+    limit = settings.RATELIMITS.get(scope)
+    if limit is None:
+        return 0
+    capacity, period = limit
+    rate = capacity / period
+    now = time.time()
+    key = BUCKET_KEY.format(scope=scope, client=client)
+    tokens, stamp = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - stamp) * rate)
+    if tokens < 1:
+        return (1 - tokens) / rate
+    cache.set(key, (tokens - 1, now), period)
+    return 0
+
+
+def too_many_requests(request, retry_after):
+    message = "Too many requests, please try again later."
+    if request.headers.get("x-requested-with") == "XMLHttpRequest":
+        response = JsonResponse({"error": message}, status=429)
+    else:
+        response = HttpResponse(message, status=429, content_type="text/plain")
+    response["Retry-After"] = math.ceil(retry_after)
+    return response
+
+
+def ratelimit(scope, methods=("POST",)):
+    """
+    Limit the ``methods`` requests to a view with the ``scope`` bucket
+    from ``settings.RATELIMITS``. Scopes missing from the setting are
+    not limited.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = take_token(scope, client_key(request))
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,126 @@
+"""
+Read replicas for the blog and about apps.
+
+With ``READ_REPLICA_URL`` set, :class:`ReplicaRouter` sends reads of
+:model:`blog.Post`, :model:`blog.Comment`, :model:`about.About` and the
+other models of ``REPLICATED_APPS`` to a random replica, and every write
+to the primary. Other apps (auth, sessions, allauth, the task queue)
+stay on the primary, where the login and session rows are written.
+
+Replicas lag behind the primary, so reads go to the primary instead:
+
+* inside a transaction on the primary, so a write and the reads around
+  it see the same data;
+* within :func:`primary`, used when filling the shared caches, which
+  would otherwise keep a stale page until the next invalidation;
+* for the rest of a request that writes, and for
+  ``REPLICA_PIN_SECONDS`` afterwards, while the client sends back the
+  cookie set by :class:`ReplicaPinMiddleware`. Readers see their own new
+  comment straight away.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICATED_APPS = {"blog", "about"}
+PIN_COOKIE = "primary_db"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+pinned = ContextVar("pinned", default=False)
+
+
+@contextmanager
+def primary():
+    """Route every read in the block to the primary."""
+    token = pinned.set(True)
+    try:
+        yield
+    finally:
+        pinned.reset(token)
+
+
+def use_primary():
+    return pinned.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+class ReplicaRouter:
+    """
+    Reads of the replicated apps go to ``settings.REPLICAS`` unless
+    :func:`use_primary`; everything else uses the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.REPLICAS \
+                or model._meta.app_label not in REPLICATED_APPS \
+                or use_primary():
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        # Also stops saves of instances read from a replica going back
+        # to it, Django's fallback when no router has an answer.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        aliases = {DEFAULT_DB_ALIAS, *settings.REPLICAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas receive the schema from the primary.
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaPinMiddleware:
+    """
+    Pin requests that write, and requests carrying :data:`PIN_COOKIE`,
+    to the primary, and set the cookie on successful writes.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.wants_primary(request):
+            return self.get_response(request)
+        with primary():
+            response = self.get_response(request)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        if not self.wants_primary(request):
+            return await self.get_response(request)
+        with primary():
+            response = await self.get_response(request)
+        return self.pin(request, response)
+
+    def wants_primary(self, request):
+        return bool(settings.REPLICAS) and (
+            request.method not in SAFE_METHODS
+            or PIN_COOKIE in request.COOKIES
+        )
+
+    def pin(self, request, response):
+        if request.method not in SAFE_METHODS \
+                and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=request.is_secure(),
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
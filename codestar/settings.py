@@ -60,13 +60,16 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'cloudinary_storage',
     'django.contrib.sites',
+    'django.contrib.sitemaps',
     'allauth',
-    'allauth.account',
+    # allauth.account, checking for codestar's AccountMiddleware.
+    'codestar.apps.AccountConfig',
     'allauth.socialaccount',
     'crispy_forms',
     'crispy_bootstrap5',
     'django_summernote',
     'cloudinary',
+    'codestar',
     'blog',
     'about',
 ]
@@ -80,21 +83,26 @@ CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Straight after SecurityMiddleware so static requests skip the rest.
+    'codestar.middleware.WhiteNoiseMiddleware',
+    'codestar.perf.PerformanceMiddleware',
+    'codestar.routers.ReplicaPinMiddleware',
+    'codestar.middleware.PublicCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
-    'allauth.account.middleware.AccountMiddleware',
+    'codestar.middleware.AccountMiddleware',
 ]
 
 ROOT_URLCONF = 'codestar.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The stock backend, with render times recorded by codestar.perf.
+        'BACKEND': 'codestar.backends.templates.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -109,13 +117,103 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'codestar.wsgi.application'
+ASGI_APPLICATION = 'codestar.asgi.application'
+
+TEST_RUNNER = 'codestar.test_runner.TestRunner'
+
+# How gunicorn serves the site (see gunicorn.conf.py): "sync" workers,
+# "threaded" gthread workers, or "async" uvicorn workers on ASGI, which
+# also route the read views to their async versions.
+WEB_MODE = os.environ.get("WEB_MODE", "sync")
+ASYNC_VIEWS = WEB_MODE == "async"
 
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# Connections are kept open between requests for DB_CONN_MAX_AGE seconds
+# and checked before reuse unless DB_CONN_HEALTH_CHECKS is "False". Async
+# workers run each request's queries on a different thread, where a kept
+# connection would never be reused, so they always close them.
+def database(url):
+    if WEB_MODE == "async":
+        conn_max_age = 0
+    else:
+        conn_max_age = int(os.environ.get("DB_CONN_MAX_AGE", 600))
+    config = dj_database_url.parse(
+        url,
+        conn_max_age=conn_max_age,
+        ssl_require=os.environ.get("DB_SSL_REQUIRE") == "True",
+    )
+    config['CONN_HEALTH_CHECKS'] = (
+        os.environ.get("DB_CONN_HEALTH_CHECKS", "True") == "True"
+    )
+    if 'postgresql' in config['ENGINE']:
+        # Same backend as django.db.backends.postgresql, also timing how
+        # long new connections take to open for the dbstats command.
+        config['ENGINE'] = 'codestar.backends.postgresql'
+        config.setdefault('OPTIONS', {})
+        config['OPTIONS']['connect_timeout'] = int(
+            os.environ.get("DB_CONNECT_TIMEOUT", 5)
+        )
+        # DB_POOL_MODE=pgbouncer: connections go through a transaction-mode
+        # pooler, which cannot hold server-side cursors across
+        # transactions.
+        if os.environ.get("DB_POOL_MODE") == "pgbouncer":
+            config['DISABLE_SERVER_SIDE_CURSORS'] = True
+    return config
+
+
 DATABASES = {
-    'default': dj_database_url.parse(os.environ.get("DATABASE_URL"))
+    'default': database(os.environ.get("DATABASE_URL")),
+}
+
+# READ_REPLICA_URL: comma-separated URLs of read replicas of the primary
+# (for a local try-out, a copy of the SQLite file). Reads of the blog and
+# about apps are spread over them by codestar.routers, except for
+# REPLICA_PIN_SECONDS after a visitor's own write.
+REPLICAS = []
+for number, url in enumerate(
+    filter(None, os.environ.get("READ_REPLICA_URL", "").split(",")), 1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = database(url.strip())
+    # Tests read the replicas through the test primary.
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['codestar.routers.ReplicaRouter']
+REPLICA_PIN_SECONDS = int(os.environ.get("REPLICA_PIN_SECONDS", 10))
+
+# Seconds between each worker publishing its connection statistics.
+DB_STATS_PUBLISH_INTERVAL = int(
+    os.environ.get("DB_STATS_PUBLISH_INTERVAL", 30)
+)
+
+# Share of requests kept in the per-process timing aggregate shown at
+# /admin/performance/, and how many samples are kept per URL name.
+PERF_SAMPLE_RATE = float(os.environ.get("PERF_SAMPLE_RATE", 0.1))
+PERF_SAMPLE_SIZE = 500
+# Send the Server-Timing header to every visitor, not only staff. It is
+# never added to responses marked public.
+PERF_SERVER_TIMING = os.environ.get("PERF_SERVER_TIMING") == "True"
+
+# One line per request from codestar.perf, at INFO. Quiet under test.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'codestar.perf': {
+            'handlers': ['console'],
+            'level': os.environ.get("PERF_LOG_LEVEL", 'INFO'),
+            'propagate': False,
+        },
+    },
 }
 
 # DATABASES = {
@@ -126,6 +224,47 @@ DATABASES = {
 # }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory by default; set CACHE_DIR to share a file-based cache
+# between gunicorn workers.
+
+if os.environ.get("CACHE_DIR"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get("CACHE_DIR"),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'codestar',
+        }
+    }
+
+# Seconds to keep cached post pages and fragments.
+BLOG_CACHE_TIMEOUT = int(os.environ.get("BLOG_CACHE_TIMEOUT", 60 * 60))
+
+# Comments shown on a post before "Load more comments".
+BLOG_COMMENTS_PER_PAGE = 25
+
+# Token buckets for write endpoints (codestar.ratelimit), per user or IP:
+# scope -> (burst size, seconds to refill the whole burst).
+RATELIMITS = {
+    'comment': (5, 60),
+    'comment_edit': (10, 60),
+    'collaborate': (3, 10 * 60),
+}
+# Proxies in front of the app that append to X-Forwarded-For; 0 uses
+# REMOTE_ADDR. Defaults to Heroku's router on a Heroku dyno (which sets
+# DYNO), or else every client would share the router's address.
+RATELIMIT_TRUSTED_PROXIES = int(os.environ.get(
+    "RATELIMIT_TRUSTED_PROXIES", 1 if "DYNO" in os.environ else 0
+))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -161,6 +300,22 @@ MESSAGE_TAGS = {
     messages.ERROR: 'alert-danger',
 }
 
+# Flash messages travel in a signed cookie, so showing one never needs a
+# session, and sessions are read through the cache before the database.
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+# Post reads are counted in memory and written to PostStats by each
+# worker every VIEW_FLUSH_INTERVAL seconds (only on demand under test,
+# see codestar.test_runner), and popularity halves every
+# POPULAR_HALF_LIFE hours. See blog.popularity.
+VIEW_FLUSH_INTERVAL = int(os.environ.get("VIEW_FLUSH_INTERVAL", 30))
+POPULAR_HALF_LIFE = float(os.environ.get("POPULAR_HALF_LIFE", 24))
+
+# Seconds shared caches (a CDN) may keep pages served to anonymous
+# visitors without cookies; see codestar.middleware.PublicCacheMiddleware.
+PUBLIC_CACHE_SECONDS = int(os.environ.get("PUBLIC_CACHE_SECONDS", 60))
+
 
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/4.2/howto/static-files/
@@ -169,6 +324,21 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static'), ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# collectstatic writes content-hashed copies of every file plus gzip and
+# Brotli variants; WhiteNoise serves the hashed names as immutable for a
+# year or more. Files not collected yet are hashed from STATIC_ROOT if
+# they are there, and otherwise keep their plain name.
+WHITENOISE_MANIFEST_STRICT = False
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'codestar.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -0,0 +1,111 @@
+"""
+A small background task queue kept in the database.
+
+Functions decorated with :func:`task` gain a ``delay(**kwargs)`` method
+that inserts a :model:`codestar.Task` row, inside the caller's
+transaction, so the work is only queued if the triggering change is
+committed. The ``run_tasks`` management command claims and runs due
+tasks; no broker is needed. Failed tasks are retried with exponential
+back-off up to :data:`MAX_ATTEMPTS` times, then left as Failed with
+their traceback. Tasks left Running by a worker that died are claimed
+again once :data:`LEASE_SECONDS` have passed since they were claimed.
+
+Keyword arguments are stored as JSON, so pass ids rather than model
+instances. Tasks read from the primary database, as a task queued by a
+write may run before the replicas have the rows it wrote.
+"""
+import traceback
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import DONE, FAILED, PENDING, RUNNING, Task
+from .routers import primary
+
+MAX_ATTEMPTS = 5
+# Seconds before the first retry; doubled after each further failure.
+RETRY_DELAY = 30
+# Seconds a claimed task may run before it is presumed lost with its
+# worker and claimed again. Tasks must finish well within it.
+LEASE_SECONDS = 15 * 60
+LOST_ERROR = "The worker stopped before the task finished."
+
+
+def task(func):
+    """Register ``func`` as a task and give it a ``delay`` method."""
+    func.task_name = f"{func.__module__}.{func.__qualname__}"
+
+    def delay(**kwargs):
+        return Task.objects.create(name=func.task_name, kwargs=kwargs)
+
+    func.delay = delay
+    return func
+
+
+def claim(limit):
+    """
+    Mark up to ``limit`` due tasks as running and return them.
+
+    Due tasks are pending ones whose ``run_after`` has passed and running
+    ones whose lease has expired. Each task is claimed with a conditional
+    UPDATE, so several workers can poll the same table without running a
+    task twice. Expired tasks already tried :data:`MAX_ATTEMPTS` times
+    are failed instead.
+    """
+    now = timezone.now()
+    expired = Q(
+        status=RUNNING, updated_on__lt=now - timedelta(seconds=LEASE_SECONDS)
+    )
+    Task.objects.filter(expired, attempts__gte=MAX_ATTEMPTS).update(
+        status=FAILED, last_error=LOST_ERROR, updated_on=now
+    )
+    due = Q(status=PENDING, run_after__lte=now) | expired
+    candidates = list(
+        Task.objects.filter(status=PENDING, run_after__lte=now)
+        .values_list("pk", flat=True)[:limit]
+    )
+    if len(candidates) < limit:
+        candidates += Task.objects.filter(expired).values_list(
+            "pk", flat=True
+        )[:limit - len(candidates)]
+    claimed = []
+    for pk in candidates:
+        if Task.objects.filter(due, pk=pk).update(
+            status=RUNNING, attempts=F("attempts") + 1, updated_on=now
+        ):
+            claimed.append(Task.objects.get(pk=pk))
+    return claimed
+
+
+def run(task_row):
+    """
+    Run one claimed task and record the outcome. Returns whether it
+    succeeded.
+    """
+    try:
+        func = import_string(task_row.name)
+        if getattr(func, "task_name", None) != task_row.name:
+            raise ImportError(f"{task_row.name} is not a registered task.")
+        with primary():
+            func(**task_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if task_row.attempts < MAX_ATTEMPTS:
+            delay = RETRY_DELAY * 2 ** (task_row.attempts - 1)
+            Task.objects.filter(pk=task_row.pk).update(
+                status=PENDING,
+                run_after=timezone.now() + timedelta(seconds=delay),
+                last_error=error,
+                updated_on=timezone.now(),
+            )
+        else:
+            Task.objects.filter(pk=task_row.pk).update(
+                status=FAILED, last_error=error, updated_on=timezone.now()
+            )
+        return False
+    Task.objects.filter(pk=task_row.pk).update(
+        status=DONE, updated_on=timezone.now()
+    )
+    return True
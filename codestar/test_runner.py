@@ -0,0 +1,26 @@
+import logging
+
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """
+    Run the suite with the production settings, except that post reads
+    are only written out by ``flush(force=True)``, so no query count
+    includes a flush that happened to fall due, and the per-request
+    ``codestar.perf`` lines are kept out of the output.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.overrides = override_settings(VIEW_FLUSH_INTERVAL=float('inf'))
+        self.overrides.enable()
+        self.perf_logger = logging.getLogger('codestar.perf')
+        self.perf_level = self.perf_logger.level
+        self.perf_logger.setLevel(logging.WARNING)
+
+    def teardown_test_environment(self, **kwargs):
+        self.perf_logger.setLevel(self.perf_level)
+        self.overrides.disable()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,354 @@
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import SyncToAsync, iscoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.asgi import ASGIHandler
+from django.core.cache import cache
+from django.core.management import call_command
+from django.contrib.auth.models import User
+from django.db import connections
+from django.http import HttpResponse
+from django.test import (
+    Client, RequestFactory, SimpleTestCase, TestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from about.models import About
+from blog.models import Post
+
+from .checks import check_static_references
+from .dbstats import published_snapshots, stats
+from .models import FAILED, PENDING, Task
+from .perf import aggregate
+from .routers import (
+    PIN_COOKIE, ReplicaPinMiddleware, ReplicaRouter, pinned, primary,
+)
+from .tasks import LEASE_SECONDS, MAX_ATTEMPTS, claim, run, task
+from .webmode import async_views
+
+
+class ConnectionStatsTests(TestCase):
+    """
+    Tests for the per-worker connection statistics.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_requests_are_counted_and_published(self):
+        before = stats.snapshot()["requests"]
+        self.client.get(reverse("home"))
+        stats.publish(force=True)
+        snapshots = published_snapshots()
+        self.assertEqual(len(snapshots), 1)
+        self.assertEqual(snapshots[0]["requests"], before + 1)
+
+        out = StringIO()
+        call_command("dbstats", stdout=out)
+        self.assertIn(str(snapshots[0]["pid"]), out.getvalue())
+
+
+class StaticReferenceCheckTests(TestCase):
+    """
+    Tests for the check that every ``{% static %}`` path exists.
+    """
+
+    def test_project_templates_pass(self):
+        self.assertEqual(check_static_references(None), [])
+
+    def test_missing_file_is_reported(self):
+        references = [(Path("base.html"), "css/missing.css")]
+        with mock.patch(
+            "codestar.checks.static_references", return_value=references
+        ):
+            errors = check_static_references(None)
+        self.assertEqual([error.id for error in errors], ["codestar.E001"])
+
+
+class AsgiMiddlewareTests(SimpleTestCase):
+    """
+    Tests that every middleware runs natively under ASGI.
+    """
+
+    def test_middleware_chain_is_async(self):
+        chain = ASGIHandler()._middleware_chain
+        seen = []
+        while chain is not None:
+            self.assertNotIsInstance(chain, SyncToAsync)
+            self.assertTrue(iscoroutinefunction(chain), chain)
+            # Unwrap convert_exception_to_response().
+            chain = getattr(chain, "__wrapped__", chain)
+            seen.append(type(chain))
+            chain = getattr(chain, "get_response", None)
+        self.assertEqual(len(seen), len(settings.MIDDLEWARE) + 1)
+
+
+class StaticStorageTests(SimpleTestCase):
+    """
+    Tests for the manifest storage before and after collectstatic.
+    """
+
+    def test_uncollected_file_keeps_plain_name(self):
+        self.assertEqual(
+            staticfiles_storage.url("js/comments.js"),
+            f"{settings.STATIC_URL}js/comments.js",
+        )
+
+    def test_collected_file_uses_hashed_name(self):
+        with mock.patch.dict(
+            staticfiles_storage.hashed_files,
+            {"js/comments.js": "js/comments.0123abcd.js"},
+        ):
+            self.assertEqual(
+                staticfiles_storage.url("js/comments.js"),
+                f"{settings.STATIC_URL}js/comments.0123abcd.js",
+            )
+
+
+class PerformanceMiddlewareTests(TestCase):
+    """
+    Tests for the request timing middleware and its admin page.
+    """
+
+    def setUp(self):
+        cache.clear()
+        aggregate.clear()
+
+    def test_server_timing_reports_queries_to_staff(self):
+        response = self.client.get(reverse("home"))
+        self.assertNotIn("Server-Timing", response)
+        staff = User.objects.create_user(
+            username="staff", password="password", is_staff=True
+        )
+        self.client.force_login(staff)
+        timing = self.client.get(reverse("home"))["Server-Timing"]
+        self.assertIn("app;dur=", timing)
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn("tpl;dur=", timing)
+
+    @override_settings(PERF_SERVER_TIMING=True)
+    def test_server_timing_setting_skips_public_responses(self):
+        response = self.client.get(reverse("home"))
+        self.assertIn("public", response["Cache-Control"])
+        self.assertNotIn("Server-Timing", response)
+        self.client.get(reverse("collaborate_token"))
+        response = self.client.get(reverse("about"))
+        self.assertIn("private", response["Cache-Control"])
+        self.assertIn("Server-Timing", response)
+
+    def test_logged_as_key_value_line(self):
+        with self.assertLogs("codestar.perf", "INFO") as logs:
+            self.client.get(reverse("home"))
+        self.assertIn("view=home method=GET status=200", logs.output[0])
+        self.assertEqual(logs.records[0].perf["view"], "home")
+
+    async def test_async_views_count_queries(self):
+        with async_views(), self.assertLogs("codestar.perf", "INFO") as logs:
+            await self.async_client.get(reverse("home"))
+        self.assertGreater(logs.records[0].perf["sql_queries"], 0)
+
+    @override_settings(PERF_SAMPLE_RATE=1)
+    def test_samples_shown_to_staff(self):
+        self.client.get(reverse("home"))
+        self.assertEqual(aggregate.summary()[0]["name"], "home")
+
+        url = reverse("performance")
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = User.objects.create_user(
+            username="staff", password="password", is_staff=True
+        )
+        self.client.force_login(staff)
+        self.assertContains(self.client.get(url), "<td>home</td>")
+
+
+@task
+def failing_task():
+    raise RuntimeError("Broken")
+
+
+@task
+def routing_task():
+    # Not use_primary(), which TestCase's transaction always satisfies.
+    routing_task.pinned = pinned.get()
+
+
+class TaskQueueTests(TestCase):
+    """
+    Tests for the database task queue.
+    """
+
+    def test_claimed_once(self):
+        failing_task.delay()
+        self.assertEqual(len(claim(10)), 1)
+        self.assertEqual(claim(10), [])
+
+    def test_failures_retry_then_fail(self):
+        row = failing_task.delay()
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            Task.objects.filter(pk=row.pk).update(run_after=row.created_on)
+            (claimed,) = claim(1)
+            self.assertFalse(run(claimed))
+            row.refresh_from_db()
+            self.assertEqual(row.attempts, attempt)
+        self.assertEqual(row.status, FAILED)
+        self.assertIn("Broken", row.last_error)
+
+    def test_lost_tasks_are_claimed_again_then_failed(self):
+        row = failing_task.delay()
+        claim(1)
+        self.assertEqual(claim(1), [])
+        expired = timezone.now() - timedelta(seconds=LEASE_SECONDS + 1)
+        Task.objects.filter(pk=row.pk).update(updated_on=expired)
+        (claimed,) = claim(1)
+        self.assertEqual(claimed.attempts, 2)
+
+        Task.objects.filter(pk=row.pk).update(
+            attempts=MAX_ATTEMPTS, updated_on=expired
+        )
+        self.assertEqual(claim(1), [])
+        row.refresh_from_db()
+        self.assertEqual(row.status, FAILED)
+
+    def test_tasks_read_from_primary(self):
+        routing_task.delay()
+        (claimed,) = claim(1)
+        self.assertTrue(run(claimed))
+        self.assertTrue(routing_task.pinned)
+
+    def test_unregistered_functions_are_refused(self):
+        Task.objects.create(name="os.getcwd")
+        (claimed,) = claim(1)
+        self.assertFalse(run(claimed))
+        claimed.refresh_from_db()
+        self.assertEqual(claimed.status, PENDING)
+
+
+@override_settings(REPLICAS=["replica1"])
+class ReplicaRouterTests(SimpleTestCase):
+    """
+    Tests for the read replica router and its pinning middleware.
+    """
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+
+    def test_only_replicated_reads_leave_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), "replica1")
+        self.assertEqual(self.router.db_for_read(About), "replica1")
+        self.assertEqual(self.router.db_for_read(User), "default")
+        self.assertEqual(self.router.db_for_write(Post), "default")
+        self.assertFalse(self.router.allow_migrate("replica1", "blog"))
+
+    def test_primary_block_and_transactions_use_primary(self):
+        with primary():
+            self.assertEqual(self.router.db_for_read(Post), "default")
+        default = connections["default"]
+        with mock.patch.object(default, "in_atomic_block", True):
+            self.assertEqual(self.router.db_for_read(Post), "default")
+        self.assertEqual(self.router.db_for_read(Post), "replica1")
+
+    def test_writes_pin_the_client(self):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        middleware = ReplicaPinMiddleware(view)
+        response = middleware(self.factory.post("/"))
+        self.assertEqual(
+            response.cookies[PIN_COOKIE]["max-age"],
+            settings.REPLICA_PIN_SECONDS,
+        )
+        pinned = self.factory.get("/")
+        pinned.COOKIES[PIN_COOKIE] = "1"
+        middleware(pinned)
+        middleware(self.factory.get("/"))
+        self.assertEqual(seen, ["default", "default", "replica1"])
+
+    @override_settings(REPLICAS=[])
+    def test_no_cookie_without_replicas(self):
+        middleware = ReplicaPinMiddleware(lambda request: HttpResponse())
+        response = middleware(self.factory.post("/"))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+
+class PublicCacheTests(TestCase):
+    """
+    Tests for session-free anonymous pages and their Cache-Control.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="reader", password="password"
+        )
+        cls.post = Post.objects.create(
+            title="Public", slug="public", author=cls.user,
+            content="Body", status=1,
+        )
+        About.objects.create(title="Me", content="Bio")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_anonymous_pages_are_public_without_session(self):
+        urls = [
+            reverse("home"),
+            reverse("post_detail", args=[self.post.slug]),
+            reverse("about"),
+        ]
+        for url in urls:
+            self.client.get(url)
+        load = "django.contrib.sessions.backends.cached_db.SessionStore.load"
+        with mock.patch(load) as session_load:
+            for url in urls:
+                with self.subTest(url=url), \
+                        CaptureQueriesContext(connections["default"]) as ran:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertFalse(
+                    [q for q in ran if "django_session" in q["sql"]]
+                )
+                self.assertIn("public", response["Cache-Control"])
+                self.assertIn("Cookie", response["Vary"])
+                self.assertFalse(response.cookies)
+        session_load.assert_not_called()
+
+    def test_logged_in_pages_are_private(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("home"))
+        self.assertEqual(response["Cache-Control"], "private")
+
+    def test_collaborate_form_requires_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        data = {"name": "Ann", "email": "ann@example.com", "message": "Hi"}
+        response = client.post(reverse("about"), data)
+        self.assertEqual(response.status_code, 403)
+
+        response = client.get(reverse("collaborate_token"))
+        self.assertIn("no-cache", response["Cache-Control"])
+        data["csrfmiddlewaretoken"] = response.json()["token"]
+        response = client.post(reverse("about"), data)
+        self.assertContains(response, "Collaboration request received!")
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_about_renders_csrf_token_only_with_cookie(self):
+        response = self.client.get(reverse("about"))
+        self.assertIn("public", response["Cache-Control"])
+        self.assertContains(
+            response,
+            '<input type="hidden" name="csrfmiddlewaretoken" value="">',
+            html=True,
+        )
+        self.client.get(reverse("collaborate_token"))
+        response = self.client.get(reverse("about"))
+        self.assertIn("private", response["Cache-Control"])
+        self.assertNotContains(response, 'name="csrfmiddlewaretoken" value=""')
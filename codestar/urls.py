@@ -17,10 +17,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .views import performance
+
 
 urlpatterns = [
     path("about/", include("about.urls"), name="about-urls"),
     path("accounts/", include("allauth.urls")),
+    path('admin/performance/', admin.site.admin_view(performance),
+         name='performance'),
     path('admin/', admin.site.urls),
     path('summernote/', include('django_summernote.urls')),
     path("", include('blog.urls'), name='blog-urls'),  # Include the blog app's URLs
@@ -0,0 +1,34 @@
+from django.conf import settings
+from django.contrib import admin
+from django.shortcuts import render
+
+from .perf import aggregate
+
+
+def performance(request):
+    """
+    Show the sampled request timings of this worker process, per URL
+    name.
+
+    **Context**
+
+    ``rows``
+        One dict of p50/p95 figures per URL name, from
+        :data:`codestar.perf.aggregate`.
+    ``sample_rate``
+        The share of requests sampled.
+
+    **Template:**
+
+    :template:`admin/performance.html`
+    """
+    return render(
+        request,
+        "admin/performance.html",
+        {
+            **admin.site.each_context(request),
+            "title": "Request performance",
+            "rows": aggregate.summary(),
+            "sample_rate": settings.PERF_SAMPLE_RATE,
+        },
+    )
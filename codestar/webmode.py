@@ -0,0 +1,33 @@
+"""
+Switching the read views between their sync and async versions within
+one process.
+
+Normally the choice is made once from ``WEB_MODE`` when the URL modules
+are imported. The benchmark command and the tests use
+:func:`async_views` to re-import them with ``ASYNC_VIEWS`` on.
+"""
+import importlib
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test import override_settings
+from django.urls import clear_url_caches
+
+URL_MODULES = ("blog.urls", "about.urls")
+
+
+def reload_urls():
+    for name in (*URL_MODULES, settings.ROOT_URLCONF):
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+
+@contextmanager
+def async_views():
+    """Route the read views to their async versions inside the block."""
+    try:
+        with override_settings(ASYNC_VIEWS=True):
+            reload_urls()
+            yield
+    finally:
+        reload_urls()
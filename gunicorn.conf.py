@@ -0,0 +1,39 @@
+"""
+gunicorn settings, read automatically by ``gunicorn`` from this folder.
+
+``WEB_MODE`` picks how each worker serves requests:
+
+* ``sync`` (default): one request at a time per worker process, on WSGI.
+* ``threaded``: ``gthread`` workers serving ``WEB_THREADS`` requests at
+  once per process, on WSGI.
+* ``async``: uvicorn workers on ASGI. The read views switch to their
+  async versions (``settings.ASYNC_VIEWS``), so many readers share one
+  process while waiting on the database.
+
+``WEB_CONCURRENCY`` sets the number of worker processes, as on Heroku.
+"""
+import multiprocessing
+import os
+
+mode = os.environ.get("WEB_MODE", "sync")
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(
+    os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1)
+)
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+# Persistent connections are reused between requests on the same worker.
+keepalive = 5
+
+if mode == "async":
+    wsgi_app = "codestar.asgi:application"
+    worker_class = "uvicorn_worker.UvicornWorker"
+elif mode == "threaded":
+    wsgi_app = "codestar.wsgi:application"
+    worker_class = "gthread"
+    threads = int(os.environ.get("WEB_THREADS", 4))
+elif mode == "sync":
+    wsgi_app = "codestar.wsgi:application"
+    worker_class = "sync"
+else:
+    raise ValueError(f"Unknown WEB_MODE {mode!r}")
@@ -0,0 +1,26 @@
+const collaborateForm = document.getElementById("collaborateForm");
+
+/**
+* Fills in the CSRF token before the collaboration form is sent.
+*
+* The About page is cached for every anonymous visitor, so it is served
+* without a token. When the form's token field is empty, submitting:
+* - Fetches a token from the URL in `data-token-url`, which also sets
+* the CSRF cookie.
+* - Copies it into the form and sends the form as normal.
+*/
+collaborateForm.addEventListener("submit", async (e) => {
+  let tokenInput = collaborateForm.elements.csrfmiddlewaretoken;
+  if (tokenInput.value) {
+    return;
+  }
+  e.preventDefault();
+  try {
+    let response = await fetch(collaborateForm.dataset.tokenUrl, {
+      credentials: "same-origin",
+    });
+    tokenInput.value = (await response.json()).token;
+  } finally {
+    collaborateForm.submit();
+  }
+});
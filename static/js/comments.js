@@ -1,45 +1,134 @@
-const editButtons = document.getElementsByClassName("btn-edit");
 const commentText = document.getElementById("id_body");
 const commentForm = document.getElementById("commentForm");
 const submitButton = document.getElementById("submitButton");
+const commentList = document.getElementById("comments");
+const commentStatus = document.getElementById("commentStatus");
 
 const deleteModal = new bootstrap.Modal(document.getElementById("deleteModal"));
-const deleteButtons = document.getElementsByClassName("btn-delete");
 const deleteConfirm = document.getElementById("deleteConfirm");
+
 /**
-* Initializes edit functionality for the provided edit buttons.
-* 
-* For each button in the `editButtons` collection:
-* - Retrieves the associated comment's ID upon click.
+* Initializes edit and delete functionality for the comment buttons.
+*
+* Listens on the comment list rather than on each button so that
+* comments inserted after page load are handled too.
+*
+* When an edit button is clicked:
+* - Retrieves the associated comment's ID.
 * - Fetches the content of the corresponding comment.
 * - Populates the `commentText` input/textarea with the comment's content for editing.
 * - Updates the submit button's text to "Update".
 * - Sets the form's action attribute to the `edit_comment/{commentId}` endpoint.
+*
+* When a delete button is clicked:
+* - Points the `deleteConfirm` form's action at the
+* deletion endpoint for the specific comment.
+* - Displays a confirmation modal (`deleteModal`) to prompt
+* the user for confirmation before deletion.
 */
-for (let button of editButtons) {
-  button.addEventListener("click", (e) => {
-    let commentId = e.target.getAttribute("data-comment_id");
+commentList.addEventListener("click", (e) => {
+  let commentId = e.target.getAttribute("data-comment_id");
+  if (e.target.classList.contains("btn-edit")) {
     let commentContent = document.getElementById(`comment${commentId}`).innerText;
     commentText.value = commentContent;
     submitButton.innerText = "Update";
     commentForm.setAttribute("action", `edit_comment/${commentId}`);
+  } else if (e.target.classList.contains("btn-delete")) {
+    deleteConfirm.action = `delete_comment/${commentId}`;
+    deleteModal.show();
+  }
+});
+
+/**
+* Shows the outcome of a background comment submission above the form.
+*/
+function showCommentStatus(text, level) {
+  commentStatus.className = `alert alert-${level}`;
+  commentStatus.innerText = text;
+  commentStatus.hidden = false;
+}
+
+/**
+* The message to show for a failed comment submission: the server's
+* `error`, or its form `errors`, or the status code.
+*/
+function commentError(data, response) {
+  if (data.error) {
+    return data.error;
+  }
+  if (data.errors) {
+    return Object.values(data.errors).flat().join(" ");
+  }
+  return `Comment not saved (${response.status}). Please try again.`;
+}
+
+/**
+* Submits new comments in the background.
+*
+* When the form is not being used to edit a comment:
+* - Posts the form to the `comment_create` endpoint in `data-create-url`.
+* - Inserts the returned comment HTML at the top of the comment list.
+* - Clears the textarea and shows the returned message.
+*
+* Errors are shown above the form and the comment is kept for another
+* try. The form is only posted normally in browsers without `fetch`.
+*/
+if (commentForm && window.fetch) {
+  commentForm.addEventListener("submit", async (e) => {
+    if (commentForm.hasAttribute("action")) {
+      return;
+    }
+    e.preventDefault();
+    submitButton.disabled = true;
+    try {
+      let response = await fetch(commentForm.dataset.createUrl, {
+        method: "POST",
+        body: new FormData(commentForm),
+        headers: { "X-Requested-With": "XMLHttpRequest" },
+      });
+      let data = await response.json().catch(() => ({}));
+      if (!response.ok) {
+        showCommentStatus(commentError(data, response), "danger");
+        return;
+      }
+      commentList.insertAdjacentHTML("afterbegin", data.html);
+      commentText.value = "";
+      showCommentStatus(data.message, "success");
+    } catch (error) {
+      showCommentStatus(
+        "Comment not sent. Check your connection and try again.", "danger"
+      );
+    } finally {
+      submitButton.disabled = false;
+    }
   });
 }
 
 /**
-* Initializes deletion functionality for the provided delete buttons.
-* 
-* For each button in the `deleteButtons` collection:
-* - Retrieves the associated comment's ID upon click.
-* - Updates the `deleteConfirm` link's href to point to the 
-* deletion endpoint for the specific comment.
-* - Displays a confirmation modal (`deleteModal`) to prompt 
-* the user for confirmation before deletion.
+* Loads further comments in chunks.
+*
+* When the "Load more comments" link is clicked:
+* - Fetches the next chunk from the `comment_list` endpoint in `data-url`.
+* - Appends the returned comment HTML to the comment list.
+* - Points the link at the following chunk, or removes it at the end.
 */
-for (let button of deleteButtons) {
-  button.addEventListener("click", (e) => {
-    let commentId = e.target.getAttribute("data-comment_id");
-    deleteConfirm.href = `delete_comment/${commentId}`;
-    deleteModal.show();
+const moreComments = document.getElementById("moreComments");
+
+if (moreComments) {
+  moreComments.addEventListener("click", async (e) => {
+    e.preventDefault();
+    let response = await fetch(moreComments.dataset.url, {
+      headers: { "X-Requested-With": "XMLHttpRequest" },
+    });
+    if (!response.ok) {
+      return;
+    }
+    let data = await response.json();
+    commentList.insertAdjacentHTML("beforeend", data.html);
+    if (data.next_url) {
+      moreComments.dataset.url = data.next_url;
+    } else {
+      moreComments.remove();
+    }
   });
-}
\ No newline at end of file
+}